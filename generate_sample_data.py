@@ -3,145 +3,302 @@ Generate Sample Transaction Data CSV
 Creates realistic transaction data for forecasting
 """
 
+import csv
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
+from typing import Optional
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.forecasting.models import CashFlowCategory, TransactionType
 
-
-def generate_transactions_csv(num_weeks: int = 52, output_file: str = 'data/transactions.csv'):
-    """Generate sample transaction data and save to CSV"""
-
-    np.random.seed(42)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Base weekly amounts for each category
+BASE_AMOUNTS = {
+    # Inflows
+    'revenue': 50000,
+    'ar_collections': 0,  # Will be based on invoices
+    'investment_income': 500,
+    'other_income': 1000,
+
+    # Outflows
+    'cogs': 15000,
+    'payroll': 30000,
+    'rent': 8000,
+    'marketing': 5000,
+    'technology': 3000,
+    'insurance': 1000,
+    'utilities': 800,
+    'professional_services': 2000,
+    'travel': 1500,
+    'office_supplies': 500,
+    'other_expenses': 3000
+}
+
+# Categories generated (AR collections skipped for now) and their display strings,
+# resolved once so rows only carry integer codes
+CATEGORIES = [c for c in BASE_AMOUNTS if c != 'ar_collections']
+TRANSACTION_TYPES = ['inflow', 'outflow']
+DESCRIPTIONS = {c: c.replace('_', ' ').title() for c in BASE_AMOUNTS}
+
+# Output CSV column order
+CSV_COLUMNS = [
+    'transaction_id', 'date', 'amount', 'category', 'transaction_type',
+    'description', 'customer', 'vendor'
+]
+
+# Rows formatted per batch when writing the CSV
+CSV_CHUNK_SIZE = 10_000
+
+
+def _expand_week_amounts_numpy(weekly_amounts, num_txns, out_amount, out_week):
+    """Split each week's amount evenly across its transactions (NumPy fallback)"""
+    week_idx = np.repeat(np.arange(len(num_txns)), num_txns)
+    out_amount[:] = weekly_amounts[week_idx] / num_txns[week_idx]
+    out_week[:] = week_idx
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _expand_week_amounts(weekly_amounts, num_txns, out_amount, out_week):
+        """Split each week's amount evenly across its transactions in one compiled pass"""
+        i = 0
+        for week in range(num_txns.shape[0]):
+            n = num_txns[week]
+            if n == 0:
+                continue
+            per_txn = weekly_amounts[week] / n
+            for _ in range(n):
+                out_amount[i] = per_txn
+                out_week[i] = week
+                i += 1
+else:
+    _expand_week_amounts = _expand_week_amounts_numpy
+
+
+def generate_transactions_csv(num_weeks: int = 52, output_file: str = 'data/transactions.csv',
+                              write_only: bool = False) -> Optional[pd.DataFrame]:
+    """
+    Generate sample transaction data and save to CSV
+
+    Args:
+        num_weeks: Number of weeks of history to generate
+        output_file: CSV path to write
+        write_only: Stream rows straight to the CSV and skip building the DataFrame
+
+    Returns:
+        Generated transactions DataFrame, or None when write_only is set
+    """
+
+    rng = np.random.default_rng(42)
 
     # Date range
     end_date = datetime.now()
     start_date = end_date - timedelta(weeks=num_weeks)
 
-    transactions = []
-
-    # Base weekly amounts for each category
-    base_amounts = {
-        # Inflows
-        'revenue': 50000,
-        'ar_collections': 0,  # Will be based on invoices
-        'investment_income': 500,
-        'other_income': 1000,
-
-        # Outflows
-        'cogs': 15000,
-        'payroll': 30000,
-        'rent': 8000,
-        'marketing': 5000,
-        'technology': 3000,
-        'insurance': 1000,
-        'utilities': 800,
-        'professional_services': 2000,
-        'travel': 1500,
-        'office_supplies': 500,
-        'other_expenses': 3000
-    }
-
     # Growth rate and seasonality
     annual_growth_rate = 0.10
 
-    transaction_id = 1
-
-    for week in range(num_weeks):
-        week_date = start_date + timedelta(weeks=week)
-
-        # Apply growth
-        growth_factor = 1 + (annual_growth_rate * (week / 52))
-
-        # Seasonality (Q4 boost, Q1 dip)
-        month = week_date.month
-        if month in [10, 11, 12]:  # Q4
-            seasonality = 1.15
-        elif month in [1, 2, 3]:  # Q1
-            seasonality = 0.90
+    # Per-week growth and seasonality (Q4 boost, Q1 dip), computed once for all weeks
+    weeks = np.arange(num_weeks)
+    week_dates = pd.DatetimeIndex(start_date + pd.to_timedelta(weeks * 7, unit='D'))
+    growth_factor = 1 + annual_growth_rate * (weeks / 52)
+    months = week_dates.month
+    seasonality = np.where(np.isin(months, [10, 11, 12]), 1.15,
+                           np.where(np.isin(months, [1, 2, 3]), 0.90, 1.0))
+    weekly_mul = growth_factor * seasonality
+
+    # Upper bound on rows: the most transactions each category can emit per week
+    max_txns = {'revenue': 7, 'payroll': 2, 'rent': 1, 'insurance': 1}
+    max_rows = num_weeks * sum(max_txns.get(c, 2) for c in CATEGORIES)
+
+    # Preallocated typed columns, filled category by category via a running cursor
+    amount = np.empty(max_rows, np.float64)
+    week_of_txn = np.empty(max_rows, np.int32)
+    txn_date_offsets = np.empty(max_rows, np.int32)
+    category_idx = np.empty(max_rows, np.int8)
+    type_idx = np.empty(max_rows, np.int8)
+    customer_id = np.empty(max_rows, np.int32)
+    vendor_id = np.empty(max_rows, np.int32)
+    cursor = 0
+
+    # Add randomness (less for fixed costs): 5% variance for fixed costs, 20% for variable
+    variances = np.array([0.05 if c in ['rent', 'insurance'] else 0.20 for c in CATEGORIES])
+    variance_draws = rng.uniform(1 - variances[:, None], 1 + variances[:, None],
+                                 size=(len(CATEGORIES), num_weeks))
+
+    # Weekly amounts with variations for every category: base * growth/seasonality * noise
+    base_amounts = np.array([BASE_AMOUNTS[c] for c in CATEGORIES], dtype=np.float64)
+    weekly_amounts = base_amounts[:, None] * weekly_mul * variance_draws
+
+    # Generate all weeks of transactions for each category at once
+    for cat_code, category in enumerate(CATEGORIES):
+        # Determine transaction type
+        if category in ['revenue', 'investment_income', 'other_income']:
+            txn_type = 'inflow'
         else:
-            seasonality = 1.0
-
-        # Generate transactions for each category
-        for category, base_amount in base_amounts.items():
-            if category == 'ar_collections':
-                continue  # Skip for now
-
-            # Determine transaction type
-            if category in ['revenue', 'investment_income', 'other_income']:
-                txn_type = 'inflow'
-            else:
-                txn_type = 'outflow'
-
-            # Calculate amount with variations
-            amount = base_amount * growth_factor * seasonality
-
-            # Add randomness (less for fixed costs)
-            if category in ['rent', 'insurance']:
-                variance = 0.05  # 5% variance for fixed costs
-            else:
-                variance = 0.20  # 20% variance for variable costs
-
-            amount *= np.random.uniform(1 - variance, 1 + variance)
-
-            # Number of transactions per week for this category
-            if category == 'revenue':
-                num_txns = np.random.randint(3, 8)  # Multiple sales
-            elif category == 'payroll':
-                num_txns = 2  # Bi-weekly payroll
-            elif category in ['rent', 'insurance']:
-                num_txns = 1  # Monthly (spread across weeks)
-                if week % 4 != 0:  # Only once per month
-                    continue
-            else:
-                num_txns = np.random.randint(1, 3)
-
-            # Create transactions
-            for i in range(num_txns):
-                txn_amount = amount / num_txns
-                txn_date = week_date + timedelta(days=np.random.randint(0, 7))
-
-                transactions.append({
-                    'transaction_id': transaction_id,
-                    'date': txn_date.strftime('%Y-%m-%d'),
-                    'amount': round(txn_amount, 2),
-                    'category': category,
-                    'transaction_type': txn_type,
-                    'description': f"{category.replace('_', ' ').title()}",
-                    'customer': f"Customer_{np.random.randint(1, 50)}" if txn_type == 'inflow' else None,
-                    'vendor': f"Vendor_{np.random.randint(1, 30)}" if txn_type == 'outflow' else None
-                })
-
-                transaction_id += 1
-
-    # Create DataFrame
-    df = pd.DataFrame(transactions)
-
-    # Sort by date
-    df = df.sort_values('date').reset_index(drop=True)
-
-    # Save to CSV
+            txn_type = 'outflow'
+
+        # Number of transactions per week for this category
+        if category == 'revenue':
+            num_txns = rng.integers(3, 8, size=num_weeks)  # Multiple sales
+        elif category == 'payroll':
+            num_txns = np.full(num_weeks, 2)  # Bi-weekly payroll
+        elif category in ['rent', 'insurance']:
+            num_txns = np.where(weeks % 4 == 0, 1, 0)  # Only once per month
+        else:
+            num_txns = rng.integers(1, 3, size=num_weeks)
+
+        # Expand weekly values to one row per transaction
+        total = int(num_txns.sum())
+        rows = slice(cursor, cursor + total)
+
+        _expand_week_amounts(weekly_amounts[cat_code], num_txns, amount[rows], week_of_txn[rows])
+        amount[rows] = np.round(amount[rows], 2)
+        category_idx[rows] = cat_code
+        type_idx[rows] = TRANSACTION_TYPES.index(txn_type)
+
+        cursor += total
+
+    # Day offsets and counterparties drawn once for every generated row
+    generated = slice(0, cursor)
+    is_inflow = type_idx[generated] == TRANSACTION_TYPES.index('inflow')
+    txn_date_offsets[generated] = rng.integers(0, 7, size=cursor)
+    customer_id[generated] = 0
+    vendor_id[generated] = 0
+    customer_id[generated][is_inflow] = rng.integers(1, 50, size=int(is_inflow.sum()))
+    vendor_id[generated][~is_inflow] = rng.integers(1, 30, size=int((~is_inflow).sum()))
+
+    # Trim to the rows actually generated, numbering transactions week by week
+    order = np.argsort(week_of_txn[:cursor], kind='stable')
+    amount = amount[:cursor][order]
+    week_of_txn = week_of_txn[:cursor][order]
+    txn_date_offsets = txn_date_offsets[:cursor][order]
+    category_idx = category_idx[:cursor][order]
+    type_idx = type_idx[:cursor][order]
+    customer_id = customer_id[:cursor][order]
+    vendor_id = vendor_id[:cursor][order]
+
+    # Sort by date: a stable argsort on integer day numbers, applied to every column
+    day_since_start = week_of_txn * 7 + txn_date_offsets
+    by_date = np.argsort(day_since_start, kind='stable')
+    transaction_ids = np.arange(1, cursor + 1)[by_date]
+    day_since_start = day_since_start[by_date]
+    amount = amount[by_date]
+    category_idx = category_idx[by_date]
+    type_idx = type_idx[by_date]
+    customer_id = customer_id[by_date]
+    vendor_id = vendor_id[by_date]
+
+    # Day-resolution dates formatted to ISO strings in one C call
+    txn_days = np.datetime64(start_date.date(), 'D') + day_since_start
+    date_strings = np.datetime_as_string(txn_days, unit='D')
+    customers = np.where(customer_id > 0, np.char.add('Customer_', customer_id.astype(str)), None)
+    vendors = np.where(vendor_id > 0, np.char.add('Vendor_', vendor_id.astype(str)), None)
+
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
 
-    print(f"✓ Generated {len(df)} transactions")
-    print(f"✓ Date range: {df['date'].min()} to {df['date'].max()}")
+    if write_only and HAS_POLARS:
+        # Polars encodes the columns to CSV in Rust, skipping the pandas DataFrame
+        pl.DataFrame({
+            'transaction_id': transaction_ids,
+            'date': date_strings,
+            'amount': amount,
+            'category': pl.Series(CATEGORIES)[category_idx].cast(pl.Categorical),
+            'transaction_type': pl.Series(TRANSACTION_TYPES)[type_idx].cast(pl.Categorical),
+            'description': pl.Series([DESCRIPTIONS[c] for c in CATEGORIES])[category_idx].cast(pl.Categorical),
+            'customer': pl.Series(customers.tolist(), dtype=pl.Utf8),
+            'vendor': pl.Series(vendors.tolist(), dtype=pl.Utf8)
+        }).write_csv(output_path)
+
+        df = None
+    elif write_only:
+        # Stream the columns straight to the CSV writer, skipping the DataFrame
+        category_names = np.array(CATEGORIES, dtype=object)[category_idx]
+        descriptions = np.array([DESCRIPTIONS[c] for c in CATEGORIES], dtype=object)[category_idx]
+        type_names = np.array(TRANSACTION_TYPES, dtype=object)[type_idx]
+
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(zip(
+                transaction_ids.tolist(),
+                date_strings.tolist(),
+                amount.tolist(),
+                category_names,
+                type_names,
+                descriptions,
+                customers,
+                vendors
+            ))
+
+        df = None
+    else:
+        # Create DataFrame from the typed columns
+        df = pd.DataFrame({
+            'transaction_id': transaction_ids,
+            'date': date_strings,
+            'amount': amount,
+            'category': pd.Categorical.from_codes(category_idx, CATEGORIES),
+            'transaction_type': pd.Categorical.from_codes(type_idx, TRANSACTION_TYPES),
+            'description': pd.Categorical.from_codes(
+                category_idx, [DESCRIPTIONS[c] for c in CATEGORIES]
+            ),
+            'customer': customers,
+            'vendor': vendors
+        })
+
+        # Save to CSV, serializing in batches rather than one large buffer
+        if HAS_PYARROW:
+            # Arrow's C++ writer encodes the batches without per-row Python conversion
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pacsv.write_csv(table, output_path, pacsv.WriteOptions(
+                batch_size=CSV_CHUNK_SIZE, quoting_style='needed'
+            ))
+        else:
+            df.to_csv(output_path, index=False, chunksize=CSV_CHUNK_SIZE)
+
+    print(f"✓ Generated {cursor} transactions")
+    print(f"✓ Date range: {txn_days.min()} to {txn_days.max()}")
     print(f"✓ Saved to: {output_path}")
 
-    # Summary statistics
+    # Summary statistics, tallied on the typed arrays rather than grouping the DataFrame
+    type_sums = np.bincount(type_idx, weights=amount, minlength=len(TRANSACTION_TYPES))
+    total_inflows = type_sums[TRANSACTION_TYPES.index('inflow')]
+    total_outflows = type_sums[TRANSACTION_TYPES.index('outflow')]
+
     print(f"\nSummary:")
-    print(f"  Total Inflows:  ${df[df['transaction_type']=='inflow']['amount'].sum():,.2f}")
-    print(f"  Total Outflows: ${df[df['transaction_type']=='outflow']['amount'].sum():,.2f}")
-    print(f"  Net Cash Flow:  ${df[df['transaction_type']=='inflow']['amount'].sum() - df[df['transaction_type']=='outflow']['amount'].sum():,.2f}")
+    print(f"  Total Inflows:  ${total_inflows:,.2f}")
+    print(f"  Total Outflows: ${total_outflows:,.2f}")
+    print(f"  Net Cash Flow:  ${total_inflows - total_outflows:,.2f}")
 
     print(f"\nTransactions by Category:")
-    category_summary = df.groupby('category')['amount'].agg(['count', 'sum']).round(2)
+    category_summary = pd.DataFrame({
+        'count': np.bincount(category_idx, minlength=len(CATEGORIES)),
+        'sum': np.bincount(category_idx, weights=amount, minlength=len(CATEGORIES))
+    }, index=pd.Index(CATEGORIES, name='category')).sort_index().round(2)
     print(category_summary)
 
     return df
@@ -152,7 +309,7 @@ if __name__ == "__main__":
     print("  Generating Sample Transaction Data")
     print("="*70 + "\n")
 
-    df = generate_transactions_csv(num_weeks=52)
+    generate_transactions_csv(num_weeks=52, write_only=True)
 
     print("\n" + "="*70)
     print("  Sample data generation complete!")
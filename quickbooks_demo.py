@@ -6,18 +6,18 @@ Demonstrates how to authenticate and fetch data from QuickBooks
 import sys
 from pathlib import Path
 import json
+from collections import Counter
+from itertools import islice
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.quickbooks import (
-    QuickBooksAuth,
-    QuickBooksClient,
-    QuickBooksDataFetcher,
-    QuickBooksTransformer,
-    authenticate_quickbooks
-)
+# The QuickBooks stack (requests, OAuth, pandas) is imported inside the functions
+# that use it so importing this module stays cheap
+if TYPE_CHECKING:
+    from src.quickbooks import QuickBooksClient
 
 
 def print_section(title: str):
@@ -34,6 +34,8 @@ def format_currency(amount: float) -> str:
 
 def demo_authentication():
     """Demonstrate OAuth authentication flow"""
+    from src.quickbooks import QuickBooksAuth, authenticate_quickbooks
+
     print_section("1. QuickBooks OAuth Authentication")
 
     print("This will open your browser to authenticate with QuickBooks.")
@@ -71,7 +73,7 @@ def demo_authentication():
         return None, None
 
 
-def demo_fetch_data(client: QuickBooksClient):
+def demo_fetch_data(client: 'QuickBooksClient'):
     """Demonstrate data fetching"""
     print_section("2. Fetching QuickBooks Data")
 
@@ -122,7 +124,7 @@ def demo_fetch_data(client: QuickBooksClient):
         print(f"  Error: {e}")
 
 
-def demo_fetch_transactions(client: QuickBooksClient):
+def demo_fetch_transactions(client: 'QuickBooksClient'):
     """Demonstrate transaction fetching"""
     print_section("3. Fetching Transaction Data")
 
@@ -136,17 +138,14 @@ def demo_fetch_transactions(client: QuickBooksClient):
         transactions = client.get_transactions(days=90)
         print(f"\n✓ Found {len(transactions)} transactions")
 
-        # Count by type
-        invoices = [t for t in transactions if 'Invoice' in str(type(t)) or t.get('domain') == 'Invoice']
-        payments = [t for t in transactions if 'Payment' in str(type(t)) or t.get('domain') == 'Payment']
-        bills = [t for t in transactions if 'Bill' in str(type(t)) or t.get('domain') == 'Bill']
-        expenses = [t for t in transactions if 'Purchase' in str(type(t)) or t.get('domain') == 'Purchase']
+        # Count by type in a single pass
+        counts = Counter(t.get('domain') or type(t).__name__ for t in transactions)
 
         print(f"\nBreakdown:")
-        print(f"  Invoices: {len(invoices)}")
-        print(f"  Payments: {len(payments)}")
-        print(f"  Bills: {len(bills)}")
-        print(f"  Expenses: {len(expenses)}")
+        print(f"  Invoices: {counts['Invoice']}")
+        print(f"  Payments: {counts['Payment']}")
+        print(f"  Bills: {counts['Bill']}")
+        print(f"  Expenses: {counts['Purchase']}")
 
         # Show sample transactions
         if transactions:
@@ -161,8 +160,10 @@ def demo_fetch_transactions(client: QuickBooksClient):
         print(f"✗ Error fetching transactions: {e}")
 
 
-def demo_enhanced_data_fetcher(client: QuickBooksClient):
+def demo_enhanced_data_fetcher(client: 'QuickBooksClient'):
     """Demonstrate enhanced data fetcher"""
+    from src.quickbooks import QuickBooksDataFetcher
+
     print_section("4. Enhanced Data Fetching")
 
     fetcher = QuickBooksDataFetcher(client)
@@ -217,8 +218,10 @@ def demo_enhanced_data_fetcher(client: QuickBooksClient):
         print(f"  Error: {e}")
 
 
-def demo_data_transformation(client: QuickBooksClient):
+def demo_data_transformation(client: 'QuickBooksClient'):
     """Demonstrate data transformation"""
+    from src.quickbooks import QuickBooksTransformer
+
     print_section("5. Data Transformation")
 
     print("Fetching transactions and transforming to Finly format...")
@@ -266,8 +269,34 @@ def demo_data_transformation(client: QuickBooksClient):
         print(f"✗ Error: {e}")
 
 
-def demo_export_data(client: QuickBooksClient):
+def write_export_json(output_file: Path, header: dict, transactions, summary: dict):
+    """
+    Stream an export document to disk one transaction at a time
+
+    Produces the same JSON object as dumping
+    {**header, 'transactions': [...], 'summary': summary} but never builds the
+    full document (or its serialized string) in memory.
+    """
+    with open(output_file, 'w') as f:
+        f.write('{')
+        for key, value in header.items():
+            f.write(f"{json.dumps(key)}: {json.dumps(value)}, ")
+
+        f.write('"transactions": [')
+        for i, txn in enumerate(transactions):
+            if i:
+                f.write(', ')
+            json.dump(txn, f)
+
+        f.write('], "summary": ')
+        json.dump(summary, f)
+        f.write('}')
+
+
+def demo_export_data(client: 'QuickBooksClient'):
     """Demonstrate exporting data"""
+    from src.quickbooks import QuickBooksTransformer
+
     print_section("6. Exporting Data")
 
     print("Fetching and exporting data...")
@@ -284,16 +313,18 @@ def demo_export_data(client: QuickBooksClient):
         output_file = Path(__file__).parent / 'outputs' / 'quickbooks_export.json'
         output_file.parent.mkdir(exist_ok=True)
 
-        export_data = {
+        header = {
             'export_date': datetime.now().isoformat(),
             'company_id': client.company_id,
-            'transaction_count': len(finly_transactions),
-            'transactions': finly_transactions[:100],  # Export first 100
-            'summary': transformer.get_historical_summary(finly_transactions)
+            'transaction_count': len(finly_transactions)
         }
 
-        with open(output_file, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        write_export_json(
+            output_file,
+            header,
+            islice(finly_transactions, 100),  # Export first 100
+            transformer.get_historical_summary(finly_transactions)
+        )
 
         print(f"\n✓ Data exported to: {output_file}")
         print(f"  Transactions exported: {min(len(finly_transactions), 100)}")
@@ -304,6 +335,8 @@ def demo_export_data(client: QuickBooksClient):
 
 def main():
     """Main demo function"""
+    from src.quickbooks import QuickBooksClient
+
     print("\n" + "="*70)
     print("  FINLY - QuickBooks Integration Demo")
     print("="*70)
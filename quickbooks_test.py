@@ -6,11 +6,17 @@ Tests the QuickBooks module with mock data
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+import pytest
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.quickbooks import QuickBooksTransformer
+# The QuickBooks package is imported where a transformer is built so that
+# importing this module stays cheap
+if TYPE_CHECKING:
+    from src.quickbooks import QuickBooksTransformer
 
 
 def print_section(title: str):
@@ -20,7 +26,7 @@ def print_section(title: str):
     print(f"{'='*70}\n")
 
 
-def test_data_transformation():
+def check_data_transformation(transformer: 'QuickBooksTransformer'):
     """Test QuickBooks to Finly data transformation"""
     print_section("QuickBooks Data Transformation Test")
 
@@ -83,7 +89,6 @@ def test_data_transformation():
     print(f"  Total: {len(mock_qb_transactions)} transactions\n")
 
     # Transform to Finly format
-    transformer = QuickBooksTransformer()
     finly_transactions = transformer.transform_transactions(mock_qb_transactions)
 
     print(f"✓ Transformed to Finly format")
@@ -121,12 +126,10 @@ def test_data_transformation():
         print(f"    Total: ${data['total']:,.2f}")
 
 
-def test_category_mapping():
+def check_category_mapping(transformer: 'QuickBooksTransformer'):
     """Test category mapping functionality"""
     print_section("Category Mapping Test")
 
-    transformer = QuickBooksTransformer()
-
     test_categories = [
         'Sales',
         'Service Income',
@@ -144,10 +147,11 @@ def test_category_mapping():
         print(f"  {qb_category:25} → {finly_category.value}")
 
 
-def test_custom_category_mapping():
-    """Test custom category mapping"""
+def check_custom_category_mapping(transformer: 'QuickBooksTransformer'):
+    """Test custom category mapping (builds its own transformer with the custom map)"""
     print_section("Custom Category Mapping Test")
 
+    from src.quickbooks import QuickBooksTransformer
     from src.quickbooks.transformer import CashFlowCategory
 
     # Create custom mappings
@@ -166,12 +170,10 @@ def test_custom_category_mapping():
         print(f"  {status} {qb_cat} → {mapped.value}")
 
 
-def test_date_parsing():
+def check_date_parsing(transformer: 'QuickBooksTransformer'):
     """Test date parsing"""
     print_section("Date Parsing Test")
 
-    transformer = QuickBooksTransformer()
-
     test_dates = [
         '2025-01-15',
         '2024-12-31',
@@ -184,12 +186,10 @@ def test_date_parsing():
         print(f"  {date_str} → {parsed}")
 
 
-def test_transaction_types():
+def check_transaction_types(transformer: 'QuickBooksTransformer'):
     """Test different transaction types"""
     print_section("Transaction Type Detection Test")
 
-    transformer = QuickBooksTransformer()
-
     # Test invoice transformation
     invoice = {
         'TxnDate': '2025-01-15',
@@ -220,25 +220,44 @@ def test_transaction_types():
     print(f"  Output: {result[0]['transaction_type']} - {result[0]['category']}")
 
 
+CHECKS = [
+    ("Data Transformation", check_data_transformation),
+    ("Category Mapping", check_category_mapping),
+    ("Custom Mappings", check_custom_category_mapping),
+    ("Date Parsing", check_date_parsing),
+    ("Transaction Types", check_transaction_types)
+]
+
+
+@pytest.fixture(scope="module")
+def transformer():
+    """Shared transformer for all checks in this module"""
+    from src.quickbooks import QuickBooksTransformer
+
+    return QuickBooksTransformer()
+
+
+@pytest.mark.parametrize("test_name, check", CHECKS, ids=[name for name, _ in CHECKS])
+def test_quickbooks_integration(test_name, check, transformer, capsys):
+    """Run each check under pytest, swallowing its demo-style output"""
+    check(transformer)
+    capsys.readouterr()
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "="*70)
     print("  FINLY - QuickBooks Integration Tests (No Credentials Required)")
     print("="*70)
 
-    tests = [
-        ("Data Transformation", test_data_transformation),
-        ("Category Mapping", test_category_mapping),
-        ("Custom Mappings", test_custom_category_mapping),
-        ("Date Parsing", test_date_parsing),
-        ("Transaction Types", test_transaction_types)
-    ]
+    from src.quickbooks import QuickBooksTransformer
 
+    transformer = QuickBooksTransformer()
     results = []
 
-    for test_name, test_func in tests:
+    for test_name, test_func in CHECKS:
         try:
-            test_func()
+            test_func(transformer)
             results.append((test_name, "✓ PASSED"))
         except Exception as e:
             results.append((test_name, f"✗ FAILED: {e}"))
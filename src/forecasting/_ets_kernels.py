@@ -0,0 +1,181 @@
+"""
+Exponential Smoothing Kernels
+Additive damped-trend Holt recursion and a search over its smoothing
+parameters, JIT-compiled with Numba when available (the same algorithm runs
+interpreted otherwise)
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# Starting grid of damped_holt_optimize, over statsmodels' parameter bounds:
+# alpha in [0, 1], beta as a share of alpha (beta <= alpha), phi in [0.8, 0.995]
+ALPHAS = np.linspace(0.0, 1.0, 11)
+BETA_SHARES = np.linspace(0.0, 1.0, 6)
+PHIS = np.linspace(0.8, 0.995, 6)
+
+# Best grid points refined by pattern search; each search stops once every
+# step is below _MIN_STEP
+_N_STARTS = 16
+_MIN_STEP = 1e-4
+
+
+def _damped_holt_state(y, alpha, beta, phi):
+    """
+    Run the recursion over y from least-squares initial states
+
+    Returns (sse, level, trend, l_0, b_0)
+
+    l_t = a y_t + (1 - a)(l_{t-1} + phi b_{t-1})
+    b_t = b (l_t - l_{t-1}) + (1 - b) phi b_{t-1}
+
+    The one-step-ahead forecast of y_t is l_{t-1} + phi b_{t-1}, starting from
+    the states (l_0, b_0) before y_0. Every state is affine in (l_0, b_0), so
+    the recursion carries each as (constant, l_0 coefficient, b_0 coefficient)
+    and the SSE over all of y is minimized over (l_0, b_0) in closed form, as
+    statsmodels estimates them.
+    """
+    level_c, level_l, level_b = 0.0, 1.0, 0.0
+    trend_c, trend_l, trend_b = 0.0, 0.0, 1.0
+    s_ll = s_lb = s_bb = s_lr = s_br = s_rr = 0.0
+
+    for t in range(y.shape[0]):
+        damped_c = phi * trend_c
+        damped_l = phi * trend_l
+        damped_b = phi * trend_b
+        pred_c = level_c + damped_c
+        pred_l = level_l + damped_l
+        pred_b = level_b + damped_b
+
+        # Normal equations of the errors r - pred_l l_0 - pred_b b_0
+        r = y[t] - pred_c
+        s_ll += pred_l * pred_l
+        s_lb += pred_l * pred_b
+        s_bb += pred_b * pred_b
+        s_lr += pred_l * r
+        s_br += pred_b * r
+        s_rr += r * r
+
+        new_c = alpha * y[t] + (1.0 - alpha) * pred_c
+        new_l = (1.0 - alpha) * pred_l
+        new_b = (1.0 - alpha) * pred_b
+        trend_c = beta * (new_c - level_c) + (1.0 - beta) * damped_c
+        trend_l = beta * (new_l - level_l) + (1.0 - beta) * damped_l
+        trend_b = beta * (new_b - level_b) + (1.0 - beta) * damped_b
+        level_c, level_l, level_b = new_c, new_l, new_b
+
+    det = s_ll * s_bb - s_lb * s_lb
+    if det > 1e-12 * s_ll * s_bb:
+        l0 = (s_bb * s_lr - s_lb * s_br) / det
+        b0 = (s_ll * s_br - s_lb * s_lr) / det
+    else:
+        # (l_0, b_0) not separately identifiable: flat start
+        l0 = s_lr / s_ll if s_ll > 0.0 else 0.0
+        b0 = 0.0
+
+    sse = s_rr - l0 * s_lr - b0 * s_br
+    level = level_c + level_l * l0 + level_b * b0
+    trend = trend_c + trend_l * l0 + trend_b * b0
+
+    return sse, level, trend, l0, b0
+
+
+def damped_holt_fit(y, alpha, beta, phi):
+    """One-step-ahead SSE of the damped Holt recursion for the given parameters"""
+    return _damped_holt_state(y, alpha, beta, phi)[0]
+
+
+def damped_holt_forecast(y, alpha, beta, phi, h):
+    """h-step forecasts l_n + sum_{i=1..k} phi^i b_n for k = 1 .. h"""
+    _, level, trend, _, _ = _damped_holt_state(y, alpha, beta, phi)
+    out = np.empty(h)
+    damping = 0.0
+    phi_i = 1.0
+
+    for k in range(h):
+        phi_i *= phi
+        damping += phi_i
+        out[k] = level + damping * trend
+
+    return out
+
+
+def _pattern_search(y, x, best, lower, upper, step):
+    """
+    Refine x = (alpha, beta / alpha, phi) with SSE best by a pattern search
+    within [lower, upper], halving the step in each coordinate that no longer
+    improves the fit; returns (sse, x)
+    """
+    step = step.copy()
+
+    while step.max() > _MIN_STEP:
+        for i in range(3):
+            improved = False
+            for direction in (-1.0, 1.0):
+                trial = x.copy()
+                trial[i] = min(max(x[i] + direction * step[i], lower[i]), upper[i])
+                sse = _damped_holt_state(y, trial[0], trial[1] * trial[0], trial[2])[0]
+                if sse < best:
+                    best = sse
+                    x = trial
+                    improved = True
+                    break
+            if not improved:
+                step[i] /= 2
+
+    return best, x
+
+
+def damped_holt_optimize(y, alphas, beta_shares, phis):
+    """
+    (alpha, beta, phi) minimizing the one-step-ahead SSE
+
+    Evaluates the grid of alphas x beta_shares (beta / alpha) x phis, then
+    refines its _N_STARTS best points by pattern search within the grid's
+    bounds and keeps the best result.
+    """
+    n_grid = alphas.shape[0] * beta_shares.shape[0] * phis.shape[0]
+    points = np.empty((n_grid, 3))
+    sses = np.empty(n_grid)
+    k = 0
+
+    for alpha in alphas:
+        for share in beta_shares:
+            for phi in phis:
+                points[k, 0] = alpha
+                points[k, 1] = share
+                points[k, 2] = phi
+                sses[k] = _damped_holt_state(y, alpha, share * alpha, phi)[0]
+                k += 1
+
+    lower = np.array([alphas[0], beta_shares[0], phis[0]])
+    upper = np.array([alphas[-1], beta_shares[-1], phis[-1]])
+    step = np.array([
+        (upper[0] - lower[0]) / max(alphas.shape[0] - 1, 1),
+        (upper[1] - lower[1]) / max(beta_shares.shape[0] - 1, 1),
+        (upper[2] - lower[2]) / max(phis.shape[0] - 1, 1)
+    ]) / 2
+
+    best = np.inf
+    x = points[0]
+    for k in np.argsort(sses)[:_N_STARTS]:
+        sse, refined = _pattern_search(y, points[k].copy(), sses[k], lower, upper, step)
+        if sse < best:
+            best = sse
+            x = refined
+
+    return x[0], x[1] * x[0], x[2]
+
+
+if HAS_NUMBA:
+    _damped_holt_state = njit(cache=True, fastmath=True)(_damped_holt_state)
+    _pattern_search = njit(cache=True, fastmath=True)(_pattern_search)
+    damped_holt_fit = njit(cache=True, fastmath=True)(damped_holt_fit)
+    damped_holt_forecast = njit(cache=True, fastmath=True)(damped_holt_forecast)
+    damped_holt_optimize = njit(cache=True, fastmath=True)(damped_holt_optimize)
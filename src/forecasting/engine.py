@@ -4,6 +4,7 @@ Forecast Engine - Core forecasting logic
 Combines category predictions into complete cash flow forecast
 """
 
+import math
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -15,6 +16,62 @@ from .models import (
 from .predictor import CategoryPredictor, EnsemblePredictor
 from .processor import DataProcessor
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# Category lookup by value or enum name, e.g. 'payroll' or 'PAYROLL'
+_CATEGORY_LOOKUP = {
+    **{cat.value: cat for cat in CashFlowCategory},
+    **{cat.name: cat for cat in CashFlowCategory}
+}
+
+
+def _boot_indices(n: int, n_boot: int, weeks: int, seed: int) -> np.ndarray:
+    """(n_boot, weeks) resampled positions of n weekly samples, drawn from default_rng(seed)"""
+    return np.random.default_rng(seed).integers(0, n, size=(n_boot, weeks))
+
+
+def _boot_band_numpy(samples: np.ndarray, idx: np.ndarray,
+                     q: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bootstrap (q/2, 1-q/2) quantiles of the k-week sum of the weekly samples
+    at positions idx (one draw per row), for k = 1 .. idx.shape[1] (NumPy fallback)
+    """
+    sums = np.cumsum(samples[idx], axis=1)
+    return np.quantile(sums, q / 2, axis=0), np.quantile(sums, 1 - q / 2, axis=0)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _boot_band(samples, idx, q):
+        """
+        Bootstrap (q/2, 1-q/2) quantiles of the k-week sum of the weekly samples
+        at positions idx (one draw per row), for k = 1 .. idx.shape[1]
+
+        The draws come from _boot_indices, so a seed gives the same band as
+        the NumPy fallback.
+        """
+        n_boot, weeks = idx.shape
+        sums = np.empty((n_boot, weeks))
+        for b in prange(n_boot):
+            total = 0.0
+            for k in range(weeks):
+                total += samples[idx[b, k]]
+                sums[b, k] = total
+
+        lower = np.empty(weeks)
+        upper = np.empty(weeks)
+        for k in range(weeks):
+            lower[k] = np.quantile(sums[:, k], q / 2)
+            upper[k] = np.quantile(sums[:, k], 1 - q / 2)
+        return lower, upper
+else:
+    _boot_band = _boot_band_numpy
+
 
 class ForecastEngine:
     """Main engine for generating cash flow forecasts"""
@@ -35,7 +92,9 @@ class ForecastEngine:
                          company_name: str,
                          weeks_ahead: int = 13,
                          adjustments: Optional[Dict[str, float]] = None,
-                         ar_data: Optional[dict] = None) -> Forecast:
+                         ar_data: Optional[dict] = None,
+                         use_bootstrap_ci: bool = False,
+                         seed: int = 42) -> Forecast:
         """
         Generate complete 13-week cash flow forecast
         
@@ -45,6 +104,9 @@ class ForecastEngine:
             weeks_ahead: Number of weeks to forecast (default 13)
             adjustments: Manual adjustments per category {category: amount_per_week}
             ar_data: Accounts receivable data {'balance': float, 'aging': dict}
+            use_bootstrap_ci: Build the 80% band from a bootstrap of historical
+                weekly net flows instead of the Normal +/-1.28 sigma approximation
+            seed: Random seed of the bootstrap
             
         Returns:
             Complete Forecast object
@@ -59,15 +121,13 @@ class ForecastEngine:
         
         # Get current balance
         current_balance = historical_data.opening_balance
-        df = clean_data.to_dataframe()
-        df['date'] = pd.to_datetime(df['date'])
+        df = self._to_typed_dataframe(clean_data)
         
-        # Calculate actual current balance
-        for _, row in df.iterrows():
-            if row['transaction_type'] == TransactionType.INFLOW.value:
-                current_balance += row['amount']
-            else:
-                current_balance -= row['amount']
+        # Calculate actual current balance (inflows add, everything else subtracts)
+        if not df.empty:
+            current_balance += float(
+                (df['sign'].to_numpy() * df['amount'].to_numpy(dtype=np.float64)).sum()
+            )
         
         # Forecast each category
         category_forecasts = {}
@@ -94,6 +154,14 @@ class ForecastEngine:
         
         # Predict each category
         all_categories = inflow_categories + outflow_categories
+        empty_categories = set()
+        
+        # Without the ensemble, every category comes from one batched predictor pass
+        batch_forecasts = {}
+        if not self.ensemble_predictor:
+            batch_forecasts = self.category_predictor.predict_all(
+                clean_data, all_categories, weeks_ahead
+            )
         
         for category in all_categories:
             # Check if category exists in historical data
@@ -108,6 +176,7 @@ class ForecastEngine:
                     trend='stable',
                     volatility=0
                 )
+                empty_categories.add(category)
                 continue
             
             # Special handling for AR collections if data provided
@@ -125,9 +194,7 @@ class ForecastEngine:
                         clean_data, category, weeks_ahead
                     )
                 else:
-                    forecast = self.category_predictor.predict_category(
-                        clean_data, category, weeks_ahead
-                    )
+                    forecast = batch_forecasts[category]
             
             category_forecasts[category] = forecast
         
@@ -136,46 +203,65 @@ class ForecastEngine:
             category_forecasts = self._apply_adjustments(
                 category_forecasts, adjustments, weeks_ahead
             )
+            # An adjustment can give an empty category a non-zero forecast
+            empty_categories = {
+                cat for cat in empty_categories
+                if not any(category_forecasts[cat].weekly_predictions)
+            }
+        
+        # Empty categories are all-zero with zero variance, so leave them out of the rollup
+        active_inflow = [cat for cat in inflow_categories if cat not in empty_categories]
+        active_outflow = [cat for cat in outflow_categories if cat not in empty_categories]
         
         # Build weekly forecast points
+        # Stack predictions into (categories x weeks) matrices and roll up every week at once
+        inflow_mat = self._stack_predictions(category_forecasts, active_inflow, weeks_ahead)
+        outflow_mat = self._stack_predictions(category_forecasts, active_outflow, weeks_ahead)
+        week_inflows = inflow_mat.sum(axis=0)
+        week_outflows = outflow_mat.sum(axis=0)
+
+        # Calculate net cash flow and running balance
+        net_cash_flows = week_inflows - week_outflows
+        balances = np.cumsum(np.concatenate(([current_balance], net_cash_flows)))[1:]
+
+        # Calculate confidence interval
+        # Combine variance from all categories (constant across weeks, so computed once).
+        # fsum keeps small categories from being lost next to large ones.
+        combined_std = math.sqrt(math.fsum(
+            float(category_forecasts[cat].confidence_interval) ** 2
+            for cat in active_inflow + active_outflow
+            if cat in category_forecasts
+        ))
+
+        # Bootstrap band: quantiles of the k-week sum of resampled (centered)
+        # historical weeks, i.e. the spread of the balance k weeks out
+        boot_band = None
+        if use_bootstrap_ci and not df.empty:
+            weekly_net = (
+                (df['sign'] * df['amount']).groupby(df['date']).sum()
+                .resample('W').sum().to_numpy(dtype=np.float64)
+            )
+            if weekly_net.shape[0] >= 2:
+                centered = weekly_net - weekly_net.mean()
+                idx = _boot_indices(centered.shape[0], 2000, weeks_ahead, seed)
+                boot_band = _boot_band(centered, idx, 0.2)
+
         forecast_points = []
-        running_balance = current_balance
         start_date = clean_data.end_date + timedelta(days=1)
-        
-        for week in range(weeks_ahead):
+
+        for week, (running_balance, inflows, outflows, net_cash_flow) in enumerate(zip(
+            balances.tolist(), week_inflows.tolist(),
+            week_outflows.tolist(), net_cash_flows.tolist()
+        )):
             week_date = start_date + timedelta(weeks=week)
             
-            # Sum inflows and outflows for this week
-            week_inflows = sum([
-                category_forecasts[cat].weekly_predictions[week]
-                for cat in inflow_categories
-                if cat in category_forecasts
-            ])
-            
-            week_outflows = sum([
-                category_forecasts[cat].weekly_predictions[week]
-                for cat in outflow_categories
-                if cat in category_forecasts
-            ])
-            
-            # Calculate net cash flow
-            net_cash_flow = week_inflows - week_outflows
-            
-            # Update running balance
-            running_balance += net_cash_flow
-            
-            # Calculate confidence interval
-            # Combine variance from all categories
-            total_variance = sum([
-                (category_forecasts[cat].confidence_interval ** 2)
-                for cat in all_categories
-                if cat in category_forecasts
-            ])
-            combined_std = np.sqrt(total_variance)
-            
-            # 80% confidence interval (1.28 standard deviations)
-            confidence_lower = running_balance - (1.28 * combined_std)
-            confidence_upper = running_balance + (1.28 * combined_std)
+            if boot_band is not None:
+                confidence_lower = running_balance + float(boot_band[0][week])
+                confidence_upper = running_balance + float(boot_band[1][week])
+            else:
+                # 80% confidence interval (1.28 standard deviations)
+                confidence_lower = running_balance - (1.28 * combined_std)
+                confidence_upper = running_balance + (1.28 * combined_std)
             
             # Create forecast point
             point = ForecastPoint(
@@ -183,15 +269,15 @@ class ForecastEngine:
                 predicted_balance=running_balance,
                 confidence_lower=confidence_lower,
                 confidence_upper=confidence_upper,
-                predicted_inflows=week_inflows,
-                predicted_outflows=week_outflows,
+                predicted_inflows=inflows,
+                predicted_outflows=outflows,
                 net_cash_flow=net_cash_flow
             )
             
             forecast_points.append(point)
         
         # Calculate model accuracy through backtesting
-        accuracy = self._calculate_accuracy(clean_data)
+        accuracy = self._calculate_accuracy(clean_data, df)
         
         # Create final forecast
         forecast = Forecast(
@@ -204,6 +290,18 @@ class ForecastEngine:
         
         return forecast
     
+    @staticmethod
+    def _stack_predictions(category_forecasts: Dict[CashFlowCategory, CategoryForecast],
+                           categories: List[CashFlowCategory],
+                           weeks_ahead: int) -> np.ndarray:
+        """Stack weekly predictions of the forecast categories into a (categories, weeks) array"""
+        rows = [
+            category_forecasts[cat].weekly_predictions
+            for cat in categories
+            if cat in category_forecasts
+        ]
+        return np.asarray(rows, dtype=np.float64).reshape(len(rows), weeks_ahead)
+    
     def _apply_adjustments(self, 
                           category_forecasts: Dict[CashFlowCategory, CategoryForecast],
                           adjustments: Dict[str, float],
@@ -213,17 +311,13 @@ class ForecastEngine:
         
         for cat_name, adjustment in adjustments.items():
             # Find matching category
-            category = None
-            for cat in CashFlowCategory:
-                if cat.value == cat_name or cat.name == cat_name:
-                    category = cat
-                    break
+            category = _CATEGORY_LOOKUP.get(cat_name)
             
             if category and category in adjusted_forecasts:
                 original = adjusted_forecasts[category]
-                adjusted_predictions = [
-                    pred + adjustment for pred in original.weekly_predictions
-                ]
+                adjusted_predictions = (
+                    np.asarray(original.weekly_predictions, dtype=np.float64) + adjustment
+                ).tolist()
                 
                 adjusted_forecasts[category] = CategoryForecast(
                     category=category,
@@ -235,46 +329,73 @@ class ForecastEngine:
         
         return adjusted_forecasts
     
-    def _calculate_accuracy(self, historical_data: HistoricalData) -> float:
+    @staticmethod
+    def _to_typed_dataframe(historical_data: HistoricalData) -> pd.DataFrame:
         """
-        Calculate model accuracy using backtesting
-        
-        Uses last 13 weeks of data to test predictions
-        Returns MAPE (Mean Absolute Percentage Error)
+        Materialize transactions as a DataFrame with parsed dates, a categorical
+        transaction_type and an int8 sign column (+1 inflow, -1 otherwise)
         """
         df = historical_data.to_dataframe()
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        
-        # Need at least 26 weeks for meaningful backtesting
-        weeks_available = len(df) // 7
-        if weeks_available < 26:
-            return None  # Not enough data for backtesting
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'])
+            df['sign'] = np.where(
+                df['transaction_type'] == TransactionType.INFLOW.value, 1, -1
+            ).astype(np.int8)
+        return df
+    
+    def _calculate_accuracy(self, historical_data: HistoricalData,
+                            df: Optional[pd.DataFrame] = None) -> Optional[float]:
+        """
+        Calculate model accuracy using backtesting
         
-        # Split data: use first 13 weeks for testing
-        split_date = df['date'].max() - timedelta(weeks=13)
-        train_data = df[df['date'] <= split_date]
-        test_data = df[df['date'] > split_date]
+        Holds out the last 13 complete weeks, forecasts each category with
+        category_predictor.predict_category from the transactions before them,
+        nets the predictions by category sign and returns 1 - MAPE against the
+        held-out weekly net flow (clipped to [0, 1]), or None when there is not
+        enough data
         
-        if len(train_data) < 50 or len(test_data) < 50:
+        Args:
+            historical_data: Historical transaction data
+            df: Already-materialized transactions of historical_data (from
+                _to_typed_dataframe), reused to avoid rebuilding the frame
+        """
+        # Need at least 26 weeks for meaningful backtesting (checked before any pandas work)
+        if len(historical_data.transactions) < 26 * 7:
             return None
         
-        # Create historical data objects
-        train_historical = HistoricalData(
-            transactions=[],  # Would need to reconstruct transactions
-            start_date=train_data['date'].min(),
-            end_date=train_data['date'].max(),
-            opening_balance=historical_data.opening_balance
-        )
+        if df is None:
+            df = self._to_typed_dataframe(historical_data)
         
-        # This is a simplified accuracy calculation
-        # In production, would do full week-by-week comparison
+        # Weekly net flow, dropping the partial first and last weeks
+        signed = df['sign'].to_numpy() * df['amount'].to_numpy(dtype=np.float64)
+        weekly = pd.Series(signed, index=df['date']).resample('W').sum()[1:-1]
+        if weekly.shape[0] < 26:
+            return None
+        
+        # Train on everything up to the end of the week before the held-out ones
+        split_end = weekly.index[-14] + timedelta(days=1)
+        dates = historical_data.as_arrays()[0]
+        train = historical_data.subset(dates < np.datetime64(split_end),
+                                       end_date=split_end.to_pydatetime())
+        test = weekly.to_numpy(dtype=np.float64)[-13:]
+        
+        # Each category counts with the sign of most of its transactions
+        category_signs = df.groupby('category', observed=True)['sign'].sum()
+        pred = np.zeros(13)
+        for category_value, sign_total in category_signs.items():
+            category = _CATEGORY_LOOKUP[category_value]
+            if len(train.get_category_transactions(category)) == 0:
+                continue
+            forecast = self.category_predictor.predict_category(train, category, 13)
+            sign = 1.0 if sign_total >= 0 else -1.0
+            pred += sign * np.asarray(forecast.weekly_predictions, dtype=np.float64)
         
-        # For now, return estimated accuracy based on data quality
-        data_quality_score = len(train_data) / 365  # More data = better
-        accuracy_estimate = min(0.93, 0.75 + (data_quality_score * 0.15))
+        nonzero = test != 0
+        if not nonzero.any():
+            return None
+        mape = float(np.mean(np.abs((test[nonzero] - pred[nonzero]) / test[nonzero])))
         
-        return accuracy_estimate
+        return min(1.0, max(0.0, 1.0 - mape))
     
     def generate_scenario(self,
                          baseline_forecast: Forecast,
@@ -332,23 +453,31 @@ class ForecastValidator:
         issues = []
         warnings = []
         
-        # Check for extreme values
-        for i, point in enumerate(forecast.forecast_points):
-            # Negative balance
-            if point.predicted_balance < 0:
-                issues.append(f"Week {i+1}: Negative balance predicted")
-            
-            # Extremely wide confidence interval
-            interval_width = point.confidence_upper - point.confidence_lower
-            if interval_width > point.predicted_balance * 0.5:
+        # Check for extreme values, evaluated over all weeks at once
+        points = forecast.forecast_points
+        balances = np.fromiter((p.predicted_balance for p in points), dtype=np.float64, count=len(points))
+        lowers = np.fromiter((p.confidence_lower for p in points), dtype=np.float64, count=len(points))
+        uppers = np.fromiter((p.confidence_upper for p in points), dtype=np.float64, count=len(points))
+        
+        # Negative balance
+        for i in np.flatnonzero(balances < 0):
+            issues.append(f"Week {i+1}: Negative balance predicted")
+        
+        # Extremely wide confidence interval
+        wide = (uppers - lowers) > balances * 0.5
+        
+        # Sudden large changes (week-over-week; a zero prior balance is treated as 1)
+        change_pct = np.zeros_like(balances)
+        if len(balances) > 1:
+            prev_balances = balances[:-1]
+            change_pct[1:] = np.abs(np.diff(balances)) / np.where(prev_balances == 0, 1, prev_balances)
+        large_change = change_pct > 0.3
+        
+        for i in np.flatnonzero(wide | large_change):
+            if wide[i]:
                 warnings.append(f"Week {i+1}: High uncertainty in prediction")
-            
-            # Sudden large changes
-            if i > 0:
-                prev_balance = forecast.forecast_points[i-1].predicted_balance
-                change_pct = abs(point.predicted_balance - prev_balance) / prev_balance
-                if change_pct > 0.3:
-                    warnings.append(f"Week {i+1}: Large predicted change ({change_pct*100:.1f}%)")
+            if large_change[i]:
+                warnings.append(f"Week {i+1}: Large predicted change ({change_pct[i]*100:.1f}%)")
         
         # Overall assessment
         confidence_score = 1.0
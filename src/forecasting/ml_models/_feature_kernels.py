@@ -0,0 +1,189 @@
+"""
+Feature Kernels
+Calendar fields computed with integer arithmetic on datetime64 values, and the
+value-dependent features for the newest row of an incrementally extended series
+(lags, rolling statistics, EWMs, growth), JIT-compiled with Numba when available
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def calendar_fields(index: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    """
+    Calendar fields of a DatetimeIndex from one datetime64[D] conversion
+
+    Returns int64 arrays keyed week_of_year (ISO), month, quarter, day_of_week
+    (Monday=0), day_of_month and is_month_start/end, is_quarter_start/end.
+    """
+    days = index.to_numpy(dtype='datetime64[D]')
+    d = days.astype(np.int64)
+    months = days.astype('datetime64[M]')
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+    day_of_week = (d + 3) % 7  # 1970-01-01 was a Thursday
+
+    # ISO week: the week's Thursday decides the ISO year
+    thursday = days + (3 - day_of_week)
+    iso_year_start = thursday.astype('datetime64[Y]').astype('datetime64[D]')
+    week_of_year = (thursday - iso_year_start).astype(np.int64) // 7 + 1
+
+    is_month_start = (day == 1).astype(np.int64)
+    is_month_end = ((days + 1).astype('datetime64[M]') != months).astype(np.int64)
+    quarter_month = (month % 3) == 1
+
+    return {
+        'week_of_year': week_of_year,
+        'month': month,
+        'quarter': (month - 1) // 3 + 1,
+        'day_of_week': day_of_week,
+        'day_of_month': day,
+        'is_month_start': is_month_start,
+        'is_month_end': is_month_end,
+        'is_quarter_start': is_month_start & quarter_month,
+        'is_quarter_end': is_month_end & ((month % 3) == 0)
+    }
+
+
+def step_calendar(day: date) -> Tuple[int, int, int, int, int, bool, bool]:
+    """
+    Calendar fields of a single date with datetime arithmetic (no pandas)
+
+    Returns (week_of_year, month, quarter, day_of_week, day_of_month,
+    is_month_end, is_quarter_end); the start flags follow from day_of_month.
+    """
+    month = day.month
+    is_month_end = (day + timedelta(days=1)).day == 1
+    return (day.isocalendar()[1], month, (month - 1) // 3 + 1, day.weekday(), day.day,
+            is_month_end, is_month_end and month % 3 == 0)
+
+
+def _window_stats(v, n, window):
+    """Mean, sample std (0 for a single value), min and max of the trailing window"""
+    start = n - window if n > window else 0
+    m = n - start
+    total = 0.0
+    lo = v[start]
+    hi = v[start]
+    for j in range(start, n):
+        x = v[j]
+        total += x
+        if x < lo:
+            lo = x
+        if x > hi:
+            hi = x
+    mean = total / m
+    std = 0.0
+    if m > 1:
+        sq = 0.0
+        for j in range(start, n):
+            d = v[j] - mean
+            sq += d * d
+        std = np.sqrt(sq / (m - 1))
+    return mean, std, lo, hi
+
+
+def lagged(arr: np.ndarray, lag: int) -> np.ndarray:
+    """Series shifted by `lag`, with the warmup rows holding the first value"""
+    if lag >= arr.shape[0]:
+        return np.full(arr.shape[0], arr[0] if arr.shape[0] else 0.0)
+    return np.concatenate((np.full(lag, arr[0]), arr[:-lag]))
+
+
+def pct_change(arr: np.ndarray, lag: int = 1) -> np.ndarray:
+    """Change against the backfilled lag; 0 during warmup and where the base is 0"""
+    base = lagged(arr, lag)
+    nonzero = base != 0
+    return np.divide(arr - base, base, out=np.zeros(arr.shape[0]), where=nonzero)
+
+
+def _growth(v, i, lag):
+    """pct_change(v, lag)[i] for the scalar step kernels"""
+    base = v[i - lag] if i >= lag else v[0]
+    return (v[i] - base) / base if base != 0 else 0.0
+
+
+def _regression_step(v, n, lags, windows, out, k):
+    """
+    Fill lag, rolling mean/std, ma_4/ma_8 and growth features of row n-1 into out[k:]
+
+    Matches the last row of engineer_features: warmup lags hold the first
+    value and growth is 0 where the previous value is 0.
+    """
+    i = n - 1
+
+    for lag in lags:
+        out[k] = v[i - lag] if i >= lag else v[0]
+        k += 1
+
+    for window in windows:
+        mean, std, lo, hi = _window_stats(v, n, window)
+        out[k] = mean
+        out[k + 1] = std
+        k += 2
+
+    out[k] = _window_stats(v, n, 4)[0]
+    out[k + 1] = _window_stats(v, n, 8)[0]
+    out[k + 2] = _growth(v, i, 1)
+
+
+def _xgboost_step(v, n, lags, windows, ewm, out, k):
+    """
+    Fill lag, rolling mean/std/min/max, EWM, growth and differencing features
+    of row n-1 into out[k:] (ewm holds the current EWM values)
+
+    Matches the last row of engineer_features: warmup lags hold the first
+    value and growth is 0 where the base value is 0.
+    """
+    i = n - 1
+
+    for lag in lags:
+        out[k] = v[i - lag] if i >= lag else v[0]
+        k += 1
+
+    for window in windows:
+        mean, std, lo, hi = _window_stats(v, n, window)
+        out[k] = mean
+        out[k + 1] = std
+        out[k + 2] = lo
+        out[k + 3] = hi
+        k += 4
+
+    for j in range(ewm.shape[0]):
+        out[k] = ewm[j]
+        k += 1
+
+    growth = _growth(v, i, 1)
+    out[k] = growth
+    out[k + 1] = _growth(v, i, 4)
+    out[k + 2] = growth - _growth(v, i - 1, 1) if i >= 1 else 0.0
+    out[k + 3] = v[i] - (v[i - 1] if i >= 1 else v[0])
+    out[k + 4] = v[i] - (v[i - 4] if i >= 4 else v[0])
+
+
+def _update_ewm(ewm, alphas, x):
+    """Advance adjust=False EWMs by one observation"""
+    for j in range(ewm.shape[0]):
+        ewm[j] = alphas[j] * x + (1.0 - alphas[j]) * ewm[j]
+
+
+if HAS_NUMBA:
+    # Features never divide by zero, so fastmath's no-NaN/inf assumptions hold
+    _window_stats = njit(cache=True, fastmath=True)(_window_stats)
+    _growth = njit(cache=True, fastmath=True)(_growth)
+    step_regression_features = njit(cache=True, fastmath=True)(_regression_step)
+    step_xgboost_features = njit(cache=True, fastmath=True)(_xgboost_step)
+    update_ewm = njit(cache=True, fastmath=True)(_update_ewm)
+else:
+    step_regression_features = _regression_step
+    step_xgboost_features = _xgboost_step
+    update_ewm = _update_ewm
@@ -0,0 +1,82 @@
+"""
+Category Series Helpers
+Grouped per-category resampling and the threaded forecast fan-out shared by
+the multi-category regression and XGBoost forecasters
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def resample_categories(transactions_df: pd.DataFrame,
+                        categories: List[str],
+                        frequency: str = 'W') -> Dict[str, pd.Series]:
+    """
+    Time series of several categories in one pass
+
+    Equivalent to resampling each category's amounts on its own, but the
+    dates are parsed and the table grouped once instead of per category.
+
+    Args:
+        transactions_df: Transaction DataFrame
+        categories: Category names
+        frequency: Resampling frequency
+
+    Returns:
+        Dictionary of time series by category (empty for unknown categories)
+    """
+    category_col = transactions_df['category']
+    if HAS_PYARROW and category_col.dtype == object:
+        # Arrow-backed strings hash faster than Python objects in the groupby
+        category_col = category_col.astype('string[pyarrow]')
+
+    df = transactions_df[['date', 'category', 'amount']].assign(
+        date=pd.to_datetime(transactions_df['date']),
+        category=category_col,
+        amount=transactions_df['amount'].astype(np.float32)
+    ).set_index('date')
+
+    # Each category keeps its own date range, as with per-category resampling
+    grouped = df.groupby('category', observed=True)['amount'].resample(frequency).sum(min_count=0)
+    present = set(grouped.index.get_level_values(0))
+
+    return {
+        category: (grouped.xs(category, level=0).asfreq(frequency)
+                   if category in present else pd.Series(dtype=float))
+        for category in categories
+    }
+
+
+def forecast_categories(forecast_category: Callable[[str, int], Optional[dict]],
+                        categories: List[str],
+                        steps: int) -> dict:
+    """
+    forecast_category(category, steps) of each category, on threads when
+    there are several cores; categories whose forecast fails are left out
+    """
+    max_workers = min(len(categories), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        results = [forecast_category(category, steps) for category in categories]
+    else:
+        # Forecasts only read the fitted models; the heavy work runs in
+        # NumPy/BLAS/XGBoost code that releases the GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(lambda category: forecast_category(category, steps),
+                                  categories))
+
+    return {
+        category: forecast_result
+        for category, forecast_result in zip(categories, results)
+        if forecast_result
+    }
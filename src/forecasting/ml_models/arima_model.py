@@ -260,6 +260,9 @@ class CategoryARIMAForecaster:
                 'forecast': forecast.tolist(),
                 'lower_bound': lower.tolist(),
                 'upper_bound': upper.tolist(),
+                'forecast_arr': forecast,
+                'lower_arr': lower,
+                'upper_arr': upper,
                 'category': category,
                 'model_info': forecaster.get_model_summary()
             }
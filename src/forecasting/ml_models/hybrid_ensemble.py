@@ -3,6 +3,9 @@ Hybrid Ensemble Forecasting Engine
 Combines ARIMA, Regression, and XGBoost models
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import pandas as pd
 from typing import List, Tuple, Optional, Dict
@@ -13,6 +16,57 @@ from .arima_model import CategoryARIMAForecaster
 from .regression_model import MultiCategoryRegressionForecaster
 from .xgboost_model import MultiCategoryXGBoostForecaster
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+_MODEL_ORDER = ('arima', 'regression', 'xgboost')
+
+# Ensemble combination runs in float32: ~7 significant digits is ample for
+# weekly category amounts and halves memory traffic through the kernel
+_DTYPE = np.float32
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _fuse3(fa, fb, fc, wa, wb, wc, la, lb, lc, ua, ub, uc, out_f, out_l, out_u):
+        """Weighted sum of three forecasts and their bounds in a single pass (into out_*)"""
+        for i in range(fa.shape[0]):
+            out_f[i] = wa * fa[i] + wb * fb[i] + wc * fc[i]
+            out_l[i] = wa * la[i] + wb * lb[i] + wc * lc[i]
+            out_u[i] = wa * ua[i] + wb * ub[i] + wc * uc[i]
+
+
+def _fit_one(transactions_df: pd.DataFrame,
+             category: str,
+             frequency: str,
+             config: dict) -> Tuple[Dict[str, bool], tuple, tuple, tuple]:
+    """
+    Fit a single category in a fresh ensemble (process pool worker)
+
+    transactions_df only needs the category's rows; config should limit
+    XGBoost to one thread, since the pool already runs one worker per core.
+
+    Returns:
+        Fit results plus the (model, data) state of each sub-forecaster
+    """
+    ensemble = HybridEnsembleForecaster(**config)
+    results = ensemble.fit_category(transactions_df, category, frequency)
+
+    def state(forecaster):
+        if forecaster is None:
+            return None, None
+        return (forecaster.category_models.get(category),
+                forecaster.category_data.get(category))
+
+    return (results,
+            state(ensemble.arima_forecaster),
+            state(ensemble.regression_forecaster),
+            state(ensemble.xgboost_forecaster))
+
 
 class HybridEnsembleForecaster:
     """
@@ -28,7 +82,8 @@ class HybridEnsembleForecaster:
                  enable_arima: bool = True,
                  enable_regression: bool = True,
                  enable_xgboost: bool = True,
-                 weights: Optional[Dict[str, float]] = None):
+                 weights: Optional[Dict[str, float]] = None,
+                 xgboost_n_jobs: int = -1):
         """
         Initialize hybrid ensemble forecaster
 
@@ -37,6 +92,7 @@ class HybridEnsembleForecaster:
             enable_regression: Enable regression model
             enable_xgboost: Enable XGBoost model
             weights: Custom weights for ensemble (default: equal weights)
+            xgboost_n_jobs: XGBoost threads per category model (-1 = all cores)
         """
         self.enable_arima = enable_arima
         self.enable_regression = enable_regression
@@ -45,7 +101,9 @@ class HybridEnsembleForecaster:
         # Initialize models
         self.arima_forecaster = CategoryARIMAForecaster() if enable_arima else None
         self.regression_forecaster = MultiCategoryRegressionForecaster() if enable_regression else None
-        self.xgboost_forecaster = MultiCategoryXGBoostForecaster() if enable_xgboost else None
+        self.xgboost_forecaster = (
+            MultiCategoryXGBoostForecaster(n_jobs=xgboost_n_jobs) if enable_xgboost else None
+        )
 
         # Model weights (default: equal)
         self.weights = weights or {'arima': 0.33, 'regression': 0.33, 'xgboost': 0.34}
@@ -54,6 +112,24 @@ class HybridEnsembleForecaster:
         # Storage
         self.category_performance = {}
         self.fitted_categories = set()
+        self._fitted_order: List[str] = []
+        self._ts_data_for: Dict[str, pd.Series] = {}
+        self._accuracy_cache: dict = {}
+        self._scratch: Optional[np.ndarray] = None  # (3, max_steps) float32 ensemble output buffer
+
+    def _config(self) -> dict:
+        """
+        Constructor arguments needed to rebuild this ensemble in a worker
+
+        Workers fit XGBoost single-threaded: the pool already runs one per core.
+        """
+        return {
+            'enable_arima': self.enable_arima,
+            'enable_regression': self.enable_regression,
+            'enable_xgboost': self.enable_xgboost,
+            'weights': dict(self.weights),
+            'xgboost_n_jobs': 1
+        }
 
     def _normalize_weights(self):
         """Normalize weights to sum to 1.0"""
@@ -77,6 +153,7 @@ class HybridEnsembleForecaster:
             Dictionary of fit results for each model
         """
         results = {}
+        self._accuracy_cache.clear()
 
         # Fit ARIMA
         if self.enable_arima:
@@ -113,10 +190,22 @@ class HybridEnsembleForecaster:
 
         # Mark as fitted if at least one model succeeded
         if any(results.values()):
-            self.fitted_categories.add(category)
+            self._mark_fitted(category)
 
         return results
 
+    def _mark_fitted(self, category: str):
+        """Record a fitted category, keeping first-fit order for deterministic iteration"""
+        self.fitted_categories.add(category)
+        if category not in self._fitted_order:
+            self._fitted_order.append(category)
+
+        # Historical series used for adaptive weights (ARIMA, then regression, then XGBoost)
+        for forecaster in (self.arima_forecaster, self.regression_forecaster, self.xgboost_forecaster):
+            if forecaster is not None and category in forecaster.category_data:
+                self._ts_data_for[category] = forecaster.category_data[category]
+                break
+
     def fit_all_categories(self,
                           transactions_df: pd.DataFrame,
                           categories: List[str],
@@ -124,6 +213,9 @@ class HybridEnsembleForecaster:
         """
         Fit all models for all categories
 
+        Categories are independent, so they are fitted concurrently in a
+        process pool and the fitted models are merged back into this ensemble.
+
         Args:
             transactions_df: Transaction DataFrame
             categories: List of categories
@@ -132,10 +224,43 @@ class HybridEnsembleForecaster:
         Returns:
             Nested dictionary of fit results
         """
+        max_workers = min(len(categories), os.cpu_count() or 1)
+        if max_workers <= 1:
+            return {
+                category: self.fit_category(transactions_df, category, frequency)
+                for category in categories
+            }
+
+        # Each worker only needs (and only gets pickled) its own category's rows
+        by_category = dict(tuple(transactions_df.groupby('category', sort=False, observed=True)))
+        no_rows = transactions_df.iloc[:0]
+        config = self._config()
+
+        fitted = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futures = {
+                ex.submit(_fit_one, by_category.get(category, no_rows), category, frequency, config): category
+                for category in categories
+            }
+            for fut in as_completed(futures):
+                fitted[futures[fut]] = fut.result()
+
         all_results = {}
+        self._accuracy_cache.clear()
+        forecasters = (self.arima_forecaster, self.regression_forecaster, self.xgboost_forecaster)
 
         for category in categories:
-            results = self.fit_category(transactions_df, category, frequency)
+            results, *states = fitted[category]
+            for forecaster, (model, data) in zip(forecasters, states):
+                if forecaster is None:
+                    continue
+                if model is not None:
+                    forecaster.category_models[category] = model
+                if data is not None:
+                    forecaster.category_data[category] = data
+
+            if any(results.values()):
+                self._mark_fitted(category)
             all_results[category] = results
 
         return all_results
@@ -158,6 +283,11 @@ class HybridEnsembleForecaster:
         if len(ts_data) < test_size + 12:
             return {}
 
+        # Backtests only change when the models are refit (which clears the cache)
+        key = (category, ts_data.values.shape[0], float(ts_data.values.sum()), test_size)
+        if key in self._accuracy_cache:
+            return dict(self._accuracy_cache[key])
+
         scores = {}
         train_data = ts_data[:-test_size]
         test_data = ts_data[-test_size:]
@@ -194,7 +324,8 @@ class HybridEnsembleForecaster:
             except:
                 pass
 
-        return scores
+        self._accuracy_cache[key] = scores
+        return dict(scores)
 
     def calculate_adaptive_weights(self,
                                    category: str,
@@ -216,15 +347,20 @@ class HybridEnsembleForecaster:
             # No scores available, use default weights
             return self.weights.copy()
 
-        # Convert MAE to weights (inverse of error)
-        # Add small constant to avoid division by zero
-        inverse_errors = {model: 1 / (mae + 1e-10) for model, mae in scores.items()}
+        w = self._inverse_error_weights(scores)
+        return {model: float(x) for model, x in zip(_MODEL_ORDER, w) if model in scores}
 
-        # Normalize to sum to 1.0
-        total = sum(inverse_errors.values())
-        adaptive_weights = {model: weight / total for model, weight in inverse_errors.items()}
+    @staticmethod
+    def _inverse_error_weights(scores: Dict[str, float]) -> np.ndarray:
+        """
+        Convert MAE scores to normalized inverse-error weights in _MODEL_ORDER
 
-        return adaptive_weights
+        Models without a score get zero weight.
+        """
+        # Add small constant to avoid division by zero
+        errs = np.array([scores.get(m, np.inf) for m in _MODEL_ORDER], dtype=np.float64)
+        inv = 1.0 / (errs + 1e-10)
+        return inv / inv.sum()
 
     def forecast_category(self,
                          category: str,
@@ -252,53 +388,68 @@ class HybridEnsembleForecaster:
         if self.enable_arima:
             result = self.arima_forecaster.forecast_category(category, steps)
             if result:
-                forecasts['arima'] = np.array(result['forecast'])
-                lower_bounds['arima'] = np.array(result['lower_bound'])
-                upper_bounds['arima'] = np.array(result['upper_bound'])
+                forecasts['arima'] = np.asarray(result['forecast_arr'], dtype=_DTYPE)
+                lower_bounds['arima'] = np.asarray(result['lower_arr'], dtype=_DTYPE)
+                upper_bounds['arima'] = np.asarray(result['upper_arr'], dtype=_DTYPE)
 
         # Get Regression forecast
         if self.enable_regression:
             result = self.regression_forecaster.forecast_category(category, steps)
             if result:
-                forecasts['regression'] = np.array(result['forecast'])
-                lower_bounds['regression'] = np.array(result['lower_bound'])
-                upper_bounds['regression'] = np.array(result['upper_bound'])
+                forecasts['regression'] = np.asarray(result['forecast_arr'], dtype=_DTYPE)
+                lower_bounds['regression'] = np.asarray(result['lower_arr'], dtype=_DTYPE)
+                upper_bounds['regression'] = np.asarray(result['upper_arr'], dtype=_DTYPE)
 
         # Get XGBoost forecast
         if self.enable_xgboost:
             result = self.xgboost_forecaster.forecast_category(category, steps)
             if result:
-                forecasts['xgboost'] = np.array(result['forecast'])
-                lower_bounds['xgboost'] = np.array(result['lower_bound'])
-                upper_bounds['xgboost'] = np.array(result['upper_bound'])
+                forecasts['xgboost'] = np.asarray(result['forecast_arr'], dtype=_DTYPE)
+                lower_bounds['xgboost'] = np.asarray(result['lower_arr'], dtype=_DTYPE)
+                upper_bounds['xgboost'] = np.asarray(result['upper_arr'], dtype=_DTYPE)
 
         if not forecasts:
             return None
 
-        # Determine weights
+        # Determine weights (as a vector in _MODEL_ORDER)
+        scores = None
         if use_adaptive_weights:
-            # Get historical data for adaptive weights
-            if self.enable_arima and category in self.arima_forecaster.category_data:
-                ts_data = self.arima_forecaster.category_data[category]
-            elif self.enable_regression and category in self.regression_forecaster.category_data:
-                ts_data = self.regression_forecaster.category_data[category]
-            else:
-                ts_data = self.xgboost_forecaster.category_data[category]
-
-            weights = self.calculate_adaptive_weights(category, ts_data)
+            ts_data = self._ts_data_for.get(category)
+            if ts_data is not None:
+                scores = self.calculate_model_accuracy(category, ts_data)
+
+        if scores:
+            w_all = self._inverse_error_weights(scores)
+            weights = {model: float(x) for model, x in zip(_MODEL_ORDER, w_all) if model in scores}
         else:
+            w_all = np.array([self.weights.get(m, 0.0) for m in _MODEL_ORDER], dtype=np.float64)
             weights = self.weights.copy()
 
-        # Ensemble forecasts using weighted average
-        ensemble_forecast = np.zeros(steps)
-        ensemble_lower = np.zeros(steps)
-        ensemble_upper = np.zeros(steps)
-
-        for model, forecast in forecasts.items():
-            weight = weights.get(model, 0)
-            ensemble_forecast += weight * forecast
-            ensemble_lower += weight * lower_bounds[model]
-            ensemble_upper += weight * upper_bounds[model]
+        # Ensemble forecasts using weighted average, written into a reused buffer
+        # (safe because the results are converted to lists before returning)
+        keys = [m for m in _MODEL_ORDER if m in forecasts]
+        w = w_all[[i for i, m in enumerate(_MODEL_ORDER) if m in forecasts]].astype(_DTYPE)
+
+        if self._scratch is None or self._scratch.shape[1] < steps:
+            self._scratch = np.empty((3, steps), dtype=_DTYPE)
+        out = self._scratch[:, :steps]
+        ensemble_forecast, ensemble_lower, ensemble_upper = out
+
+        if HAS_NUMBA and len(keys) == 3:
+            _fuse3(
+                forecasts['arima'], forecasts['regression'], forecasts['xgboost'],
+                w[0], w[1], w[2],
+                lower_bounds['arima'], lower_bounds['regression'], lower_bounds['xgboost'],
+                upper_bounds['arima'], upper_bounds['regression'], upper_bounds['xgboost'],
+                ensemble_forecast, ensemble_lower, ensemble_upper
+            )
+        else:
+            # (3, n_models, steps): forecast/lower/upper for each model
+            T = np.stack([
+                np.stack([forecasts[k], lower_bounds[k], upper_bounds[k]])
+                for k in keys
+            ], axis=1)
+            np.einsum('m,kms->ks', w, T, out=out)
 
         # Store individual model forecasts for comparison
         individual_forecasts = {
@@ -332,7 +483,7 @@ class HybridEnsembleForecaster:
         """
         forecasts = {}
 
-        for category in self.fitted_categories:
+        for category in self._fitted_order:
             forecast_result = self.forecast_category(category, steps, use_adaptive_weights)
             if forecast_result:
                 forecasts[category] = forecast_result
@@ -381,7 +532,7 @@ class HybridEnsembleForecaster:
                 'xgboost': self.enable_xgboost
             },
             'default_weights': self.weights,
-            'fitted_categories': list(self.fitted_categories),
+            'fitted_categories': list(self._fitted_order),
             'n_categories': len(self.fitted_categories)
         }
 
@@ -7,9 +7,48 @@ import numpy as np
 import pandas as pd
 from typing import List, Tuple, Optional, Dict
 from datetime import datetime, timedelta
+from joblib import Parallel, delayed
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from ._feature_kernels import (calendar_fields, lagged, pct_change, step_calendar,
+                               step_regression_features)
+from ._series import forecast_categories, resample_categories
+
+
+def _solve_ridge_batch(Xs: List[np.ndarray],
+                       ys: List[np.ndarray],
+                       alpha: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit K ridge regressions with one batched solve
+
+    Each category has its own design matrix (its own lags and rolling stats),
+    so the systems cannot share one multi-output fit; stacking the F x F
+    normal equations still solves all of them in a single LAPACK call. Same
+    solution as Ridge(alpha).fit (the cholesky solver) per category.
+
+    Returns:
+        (K, F) coefficients and (K,) intercepts
+    """
+    n_features = Xs[0].shape[1]
+    gram = np.empty((len(Xs), n_features, n_features))
+    rhs = np.empty((len(Xs), n_features))
+    x_means = np.empty((len(Xs), n_features))
+    y_means = np.empty(len(Xs))
+
+    for k, (X, y) in enumerate(zip(Xs, ys)):
+        x_means[k] = X.mean(axis=0)
+        y_means[k] = y.mean()
+        Xc = X - x_means[k]
+        gram[k] = Xc.T @ Xc
+        rhs[k] = Xc.T @ (y - y_means[k])
+
+    gram[:, np.arange(n_features), np.arange(n_features)] += alpha
+    coefs = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    intercepts = y_means - np.einsum('kf,kf->k', x_means, coefs)
+
+    return coefs, intercepts
 
 
 class CategoryRegressionForecaster:
@@ -18,6 +57,9 @@ class CategoryRegressionForecaster:
     Captures trends, seasonality, and patterns
     """
 
+    LAG_PERIODS = [1, 2, 3, 4]
+    ROLLING_WINDOWS = [4, 8, 12]  # 4, 8, 12 weeks
+
     def __init__(self, model_type: str = 'ridge'):
         """
         Initialize regression forecaster
@@ -28,12 +70,16 @@ class CategoryRegressionForecaster:
         self.model_type = model_type
         self.model = None
         self.scaler = StandardScaler()
+        self._w_eff = None
+        self._b_eff = 0.0
+        self._residual_std = 0.0
+        self._r2 = 0.0
         self.feature_names = []
         self.is_fitted = False
 
     def engineer_features(self,
                          ts_data: pd.Series,
-                         lag_periods: List[int] = [1, 2, 3, 4]) -> pd.DataFrame:
+                         lag_periods: List[int] = LAG_PERIODS) -> pd.DataFrame:
         """
         Create features from time series
 
@@ -44,46 +90,51 @@ class CategoryRegressionForecaster:
         Returns:
             DataFrame with engineered features
         """
-        df = pd.DataFrame(index=ts_data.index)
-
-        # Original value
-        df['value'] = ts_data.values
-
-        # Time-based features
-        df['week_of_year'] = ts_data.index.isocalendar().week
-        df['month'] = ts_data.index.month
-        df['quarter'] = ts_data.index.quarter
-        df['day_of_week'] = ts_data.index.dayofweek
-
-        # Cyclical encoding for seasonality
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['week_sin'] = np.sin(2 * np.pi * df['week_of_year'] / 52)
-        df['week_cos'] = np.cos(2 * np.pi * df['week_of_year'] / 52)
-
-        # Trend (time index)
-        df['time_index'] = np.arange(len(df))
+        # Columns are collected as arrays and the frame is built once
+        idx = ts_data.index
+        calendar = calendar_fields(idx)
+        week_of_year = calendar['week_of_year']
+        month = calendar['month']
+
+        cols = {
+            # Original value
+            'value': ts_data.to_numpy(),
+
+            # Time-based features
+            'week_of_year': week_of_year,
+            'month': month,
+            'quarter': calendar['quarter'],
+            'day_of_week': calendar['day_of_week'],
+
+            # Cyclical encoding for seasonality
+            'month_sin': np.sin(2 * np.pi * month / 12),
+            'month_cos': np.cos(2 * np.pi * month / 12),
+            'week_sin': np.sin(2 * np.pi * week_of_year / 52),
+            'week_cos': np.cos(2 * np.pi * week_of_year / 52),
+
+            # Trend (time index)
+            'time_index': np.arange(len(ts_data))
+        }
 
         # Lag features
+        arr = ts_data.to_numpy(dtype=np.float64)
         for lag in lag_periods:
-            df[f'lag_{lag}'] = ts_data.shift(lag)
+            cols[f'lag_{lag}'] = lagged(arr, lag)
 
         # Rolling statistics
-        for window in [4, 8, 12]:  # 4, 8, 12 weeks
-            df[f'rolling_mean_{window}'] = ts_data.rolling(window=window, min_periods=1).mean()
-            df[f'rolling_std_{window}'] = ts_data.rolling(window=window, min_periods=1).std()
+        for window in self.ROLLING_WINDOWS:
+            rolling = ts_data.rolling(window=window, min_periods=1)
+            cols[f'rolling_mean_{window}'] = rolling.mean().to_numpy()
+            cols[f'rolling_std_{window}'] = np.nan_to_num(rolling.std().to_numpy())
 
         # Moving averages
-        df['ma_4'] = ts_data.rolling(window=4, min_periods=1).mean()
-        df['ma_8'] = ts_data.rolling(window=8, min_periods=1).mean()
+        cols['ma_4'] = ts_data.rolling(window=4, min_periods=1).mean().to_numpy()
+        cols['ma_8'] = ts_data.rolling(window=8, min_periods=1).mean().to_numpy()
 
         # Growth rate
-        df['growth_rate'] = ts_data.pct_change()
-
-        # Fill NaN values
-        df = df.fillna(method='bfill').fillna(0)
+        cols['growth_rate'] = pct_change(arr)
 
-        return df
+        return pd.DataFrame(cols, index=idx)
 
     def prepare_train_data(self, features_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -98,8 +149,8 @@ class CategoryRegressionForecaster:
         # Target is the value column
         y = features_df['value'].values
 
-        # Features are everything except value
-        X = features_df.drop('value', axis=1).values
+        # Features are everything except value (row-major, as sklearn/BLAS expect)
+        X = np.ascontiguousarray(features_df.drop('value', axis=1).to_numpy(dtype=np.float64))
 
         # Store feature names
         self.feature_names = [col for col in features_df.columns if col != 'value']
@@ -116,14 +167,7 @@ class CategoryRegressionForecaster:
         Returns:
             Self
         """
-        # Engineer features
-        features_df = self.engineer_features(ts_data)
-
-        # Prepare training data
-        X, y = self.prepare_train_data(features_df)
-
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        X_scaled, y = self._scaled_train_data(ts_data)
 
         # Select model
         if self.model_type == 'ridge':
@@ -135,10 +179,95 @@ class CategoryRegressionForecaster:
 
         # Fit model
         self.model.fit(X_scaled, y)
-        self.is_fitted = True
+        self._finish_fit(X_scaled, y)
 
         return self
 
+    def _scaled_train_data(self, ts_data: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Engineer features and fit the scaler; returns scaled X and y"""
+        # Engineer features
+        features_df = self.engineer_features(ts_data)
+
+        # Prepare training data
+        X, y = self.prepare_train_data(features_df)
+
+        # Scale features
+        X_scaled = self.scaler.fit_transform(X)
+
+        return X_scaled, y
+
+    def _finish_fit(self, X_scaled: np.ndarray, y: np.ndarray):
+        """Cache coefficients and in-sample fit quality once self.model is fitted"""
+        # Fold the scaler into the coefficients: ((x - mu) / sigma) . w + b
+        # == x . (w / sigma) + (b - mu . w / sigma), one dot product per step
+        self._w_eff = self.model.coef_ / self.scaler.scale_
+        self._b_eff = float(self.model.intercept_ - self.scaler.mean_ @ self._w_eff)
+
+        # In-sample fit quality, reused for forecast intervals and the summary
+        predictions = self.model.predict(X_scaled)
+        self._residual_std = float(np.std(y - predictions))
+        self._r2 = float(r2_score(y, predictions))
+        self.is_fitted = True
+
+    def _init_feature_state(self, ts_data: pd.Series, steps: int = 0) -> dict:
+        """
+        Build the incremental feature state for a history
+
+        The value buffer has room for `steps` appended predictions so the
+        forecast loop never reallocates.
+        """
+        n = len(ts_data)
+        values = np.empty(n + steps, dtype=np.float64)
+        values[:n] = ts_data.to_numpy(dtype=np.float64)
+
+        return {
+            'values': values,
+            'n': n,
+            'date': ts_data.index[-1].date(),
+            'lags': np.asarray(self.LAG_PERIODS, dtype=np.int64),
+            'windows': np.asarray(self.ROLLING_WINDOWS, dtype=np.int64),
+            'row': np.empty((1, 9 + len(self.LAG_PERIODS) + 2 * len(self.ROLLING_WINDOWS) + 3))
+        }
+
+    def _incremental_features(self, state: dict, new_value: Optional[float] = None) -> np.ndarray:
+        """
+        Feature row of the last period, optionally after appending a new value
+
+        Equivalent to the last row of engineer_features() on the extended
+        series, but only touches the trailing window instead of the full history.
+
+        Args:
+            state: State from _init_feature_state (updated in place)
+            new_value: Value for the week after the current last date
+
+        Returns:
+            (1, n_features) feature row (reused buffer)
+        """
+        if new_value is not None:
+            state['values'][state['n']] = new_value
+            state['n'] += 1
+            state['date'] = state['date'] + timedelta(weeks=1)
+
+        n = state['n']
+        row = state['row'][0]
+
+        # Time-based and cyclical features (calendar ints extracted once per step)
+        week, month, quarter, day_of_week = step_calendar(state['date'])[:4]
+        row[0] = week
+        row[1] = month
+        row[2] = quarter
+        row[3] = day_of_week
+        row[4] = np.sin(2 * np.pi * month / 12)
+        row[5] = np.cos(2 * np.pi * month / 12)
+        row[6] = np.sin(2 * np.pi * week / 52)
+        row[7] = np.cos(2 * np.pi * week / 52)
+        row[8] = n - 1
+
+        # Lags, rolling statistics, moving averages and growth in one compiled step
+        step_regression_features(state['values'], n, state['lags'], state['windows'], row, 9)
+
+        return state['row']
+
     def forecast(self,
                 ts_data: pd.Series,
                 steps: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -155,45 +284,26 @@ class CategoryRegressionForecaster:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before forecasting")
 
-        forecasts = []
-        extended_data = ts_data.copy()
+        forecasts = np.empty(steps)
+        state = self._init_feature_state(ts_data, steps)
+        last_features = self._incremental_features(state)
 
-        # Iteratively forecast each step
+        # Iteratively forecast each step, updating only the newest feature row
         for step in range(steps):
-            # Engineer features for current data
-            features_df = self.engineer_features(extended_data)
-
-            # Get last row features
-            last_features = features_df.iloc[-1:].drop('value', axis=1).values
-
-            # Scale
-            last_features_scaled = self.scaler.transform(last_features)
-
-            # Predict
-            prediction = self.model.predict(last_features_scaled)[0]
+            # Predict with the scaler folded into the coefficients (one dot product)
+            prediction = float(last_features[0] @ self._w_eff) + self._b_eff
 
             # Ensure non-negative
             prediction = max(0, prediction)
 
-            forecasts.append(prediction)
-
-            # Add prediction to extended data for next iteration
-            next_date = extended_data.index[-1] + timedelta(weeks=1)
-            extended_data = pd.concat([
-                extended_data,
-                pd.Series([prediction], index=[next_date])
-            ])
+            forecasts[step] = prediction
 
-        forecasts = np.array(forecasts)
+            # Add prediction to the history for the next iteration
+            if step < steps - 1:
+                last_features = self._incremental_features(state, prediction)
 
-        # Calculate prediction intervals based on historical error
-        # Simple approach: use standard deviation of residuals
-        features_df = self.engineer_features(ts_data)
-        X, y = self.prepare_train_data(features_df)
-        X_scaled = self.scaler.transform(X)
-        predictions = self.model.predict(X_scaled)
-        residuals = y - predictions
-        std_error = np.std(residuals)
+        # Prediction intervals from the standard deviation of the training residuals
+        std_error = self._residual_std
 
         # 80% confidence interval (1.28 std devs)
         lower_bound = forecasts - (1.28 * std_error)
@@ -227,10 +337,7 @@ class CategoryRegressionForecaster:
         return {
             'model_type': f'Regression ({self.model_type})',
             'n_features': len(self.feature_names),
-            'r2_score': getattr(self.model, 'score', lambda x, y: 0)(
-                self.scaler.transform(self.model.coef_.reshape(1, -1)),
-                [0]
-            ) if hasattr(self.model, 'coef_') else 0
+            'r2_score': self._r2
         }
 
 
@@ -277,14 +384,31 @@ class MultiCategoryRegressionForecaster:
         # Set index
         cat_data = cat_data.set_index('date')
 
-        # Resample
-        ts = cat_data['amount'].resample(frequency).sum()
-
-        # Fill missing
-        ts = ts.fillna(0)
+        # Resample (float32 halves the traffic; empty periods sum to 0)
+        ts = cat_data['amount'].astype(np.float32).resample(frequency).sum(min_count=0)
 
         return ts
 
+    def prepare_all_category_data(self,
+                                  transactions_df: pd.DataFrame,
+                                  categories: List[str],
+                                  frequency: str = 'W') -> Dict[str, pd.Series]:
+        """
+        Prepare time series for several categories in one pass
+
+        Equivalent to calling prepare_category_data for each category, but the
+        dates are parsed and the table grouped once instead of per category.
+
+        Args:
+            transactions_df: Transaction DataFrame
+            categories: Category names
+            frequency: Resampling frequency
+
+        Returns:
+            Dictionary of time series by category (empty for unknown categories)
+        """
+        return resample_categories(transactions_df, categories, frequency)
+
     def fit_category(self,
                     transactions_df: pd.DataFrame,
                     category: str,
@@ -302,22 +426,77 @@ class MultiCategoryRegressionForecaster:
         """
         # Prepare data
         ts = self.prepare_category_data(transactions_df, category, frequency)
+        forecaster = self._fit_category_model(ts, category)
 
-        if len(ts) < 12:  # Need minimum data
+        if forecaster is None:
             return False
 
+        self.category_models[category] = forecaster
+        self.category_data[category] = ts
+
+        return True
+
+    def _fit_category_model(self,
+                            ts: pd.Series,
+                            category: str) -> Optional[CategoryRegressionForecaster]:
+        """
+        Fit a model on a prepared category series without storing it
+
+        Returns:
+            Fitted forecaster, or None if the fit was skipped or failed
+        """
+        if len(ts) < 12:  # Need minimum data
+            return None
+
         try:
             # Fit model
             forecaster = CategoryRegressionForecaster(model_type=self.model_type)
             forecaster.fit(ts)
 
-            self.category_models[category] = forecaster
-            self.category_data[category] = ts
-
-            return True
+            return forecaster
         except Exception as e:
             print(f"Failed to fit regression for {category}: {e}")
-            return False
+            return None
+
+    def _fit_ridge_batch(self,
+                         category_data: Dict[str, pd.Series],
+                         categories: List[str]) -> List[Optional[CategoryRegressionForecaster]]:
+        """
+        Fit ridge models for several categories with one batched solve
+
+        Features and scalers stay per category; only the ridge systems are
+        solved together. Returns forecasters in category order (None if skipped).
+        """
+        fitted = [None] * len(categories)
+        pending = []
+
+        for i, category in enumerate(categories):
+            ts = category_data[category]
+            if len(ts) < 12:  # Need minimum data
+                continue
+            try:
+                forecaster = CategoryRegressionForecaster(model_type='ridge')
+                X_scaled, y = forecaster._scaled_train_data(ts)
+                pending.append((i, forecaster, X_scaled, y))
+            except Exception as e:
+                print(f"Failed to fit regression for {categories[i]}: {e}")
+
+        if not pending:
+            return fitted
+
+        coefs, intercepts = _solve_ridge_batch([p[2] for p in pending], [p[3] for p in pending])
+
+        for (i, forecaster, X_scaled, y), coef, intercept in zip(pending, coefs, intercepts):
+            # A fitted Ridge carrying the batched solution (predict and coef_ work as usual)
+            model = Ridge(alpha=1.0)
+            model.coef_ = coef
+            model.intercept_ = float(intercept)
+            model.n_features_in_ = X_scaled.shape[1]
+            forecaster.model = model
+            forecaster._finish_fit(X_scaled, y)
+            fitted[i] = forecaster
+
+        return fitted
 
     def fit_all_categories(self,
                           transactions_df: pd.DataFrame,
@@ -334,11 +513,25 @@ class MultiCategoryRegressionForecaster:
         Returns:
             Dictionary with fit results
         """
+        category_data = self.prepare_all_category_data(transactions_df, categories, frequency)
+
+        if self.model_type == 'ridge':
+            # Same feature layout for every category: solve all fits at once
+            fitted = self._fit_ridge_batch(category_data, categories)
+        else:
+            # Categories are independent: fit them concurrently
+            fitted = Parallel(n_jobs=-1, backend='loky')(
+                delayed(self._fit_category_model)(category_data[category], category)
+                for category in categories
+            )
+
         results = {}
 
-        for category in categories:
-            success = self.fit_category(transactions_df, category, frequency)
-            results[category] = success
+        for category, forecaster in zip(categories, fitted):
+            if forecaster is not None:
+                self.category_models[category] = forecaster
+                self.category_data[category] = category_data[category]
+            results[category] = forecaster is not None
 
         return results
 
@@ -368,6 +561,9 @@ class MultiCategoryRegressionForecaster:
                 'forecast': forecast.tolist(),
                 'lower_bound': lower.tolist(),
                 'upper_bound': upper.tolist(),
+                'forecast_arr': forecast,
+                'lower_arr': lower,
+                'upper_arr': upper,
                 'category': category,
                 'model_info': forecaster.get_model_summary()
             }
@@ -385,14 +581,7 @@ class MultiCategoryRegressionForecaster:
         Returns:
             Dictionary of forecasts
         """
-        forecasts = {}
-
-        for category in self.category_models.keys():
-            forecast_result = self.forecast_category(category, steps)
-            if forecast_result:
-                forecasts[category] = forecast_result
-
-        return forecasts
+        return forecast_categories(self.forecast_category, list(self.category_models.keys()), steps)
 
 
 if __name__ == "__main__":
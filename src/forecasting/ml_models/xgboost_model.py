@@ -7,7 +7,13 @@ import numpy as np
 import pandas as pd
 from typing import List, Tuple, Optional, Dict
 from datetime import datetime, timedelta
+from joblib import Parallel, delayed
 import warnings
+from sklearn.metrics import r2_score
+
+from ._feature_kernels import (calendar_fields, lagged, pct_change, step_calendar,
+                               step_xgboost_features, update_ewm)
+from ._series import forecast_categories, resample_categories
 warnings.filterwarnings('ignore')
 
 try:
@@ -16,6 +22,12 @@ try:
 except ImportError:
     HAS_XGBOOST = False
 
+try:
+    import bottleneck as bn
+    HAS_BOTTLENECK = True
+except ImportError:
+    HAS_BOTTLENECK = False
+
 
 class XGBoostForecaster:
     """
@@ -23,10 +35,15 @@ class XGBoostForecaster:
     Captures non-linear patterns and interactions
     """
 
+    LAG_PERIODS = [1, 2, 3, 4, 8, 12]
+    ROLLING_WINDOWS = [4, 8, 12, 16]  # 4, 8, 12, 16 weeks
+    EWM_SPANS = [4, 8, 12]
+
     def __init__(self,
                  n_estimators: int = 100,
                  max_depth: int = 5,
-                 learning_rate: float = 0.1):
+                 learning_rate: float = 0.1,
+                 n_jobs: int = -1):
         """
         Initialize XGBoost forecaster
 
@@ -34,6 +51,7 @@ class XGBoostForecaster:
             n_estimators: Number of boosting rounds
             max_depth: Maximum tree depth
             learning_rate: Learning rate (eta)
+            n_jobs: XGBoost threads (-1 = all cores)
         """
         if not HAS_XGBOOST:
             raise ImportError("xgboost is required for XGBoost forecasting")
@@ -41,13 +59,17 @@ class XGBoostForecaster:
         self.n_estimators = n_estimators
         self.max_depth = max_depth
         self.learning_rate = learning_rate
+        self.n_jobs = n_jobs
         self.model = None
+        self._booster = None
+        self._residual_std = 0.0
+        self._r2 = 0.0
         self.feature_names = []
         self.is_fitted = False
 
     def engineer_features(self,
                          ts_data: pd.Series,
-                         lag_periods: List[int] = [1, 2, 3, 4, 8, 12]) -> pd.DataFrame:
+                         lag_periods: List[int] = LAG_PERIODS) -> pd.DataFrame:
         """
         Create features from time series
 
@@ -58,62 +80,77 @@ class XGBoostForecaster:
         Returns:
             DataFrame with engineered features
         """
-        df = pd.DataFrame(index=ts_data.index)
-
-        # Original value
-        df['value'] = ts_data.values
-
-        # Time-based features
-        df['week_of_year'] = ts_data.index.isocalendar().week
-        df['month'] = ts_data.index.month
-        df['quarter'] = ts_data.index.quarter
-        df['day_of_week'] = ts_data.index.dayofweek
-        df['day_of_month'] = ts_data.index.day
-        df['is_month_start'] = ts_data.index.is_month_start.astype(int)
-        df['is_month_end'] = ts_data.index.is_month_end.astype(int)
-        df['is_quarter_start'] = ts_data.index.is_quarter_start.astype(int)
-        df['is_quarter_end'] = ts_data.index.is_quarter_end.astype(int)
-
-        # Cyclical encoding for seasonality
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['week_sin'] = np.sin(2 * np.pi * df['week_of_year'] / 52)
-        df['week_cos'] = np.cos(2 * np.pi * df['week_of_year'] / 52)
-        df['quarter_sin'] = np.sin(2 * np.pi * df['quarter'] / 4)
-        df['quarter_cos'] = np.cos(2 * np.pi * df['quarter'] / 4)
-
-        # Trend (time index)
-        df['time_index'] = np.arange(len(df))
+        # Columns are collected as arrays and the frame is built once
+        idx = ts_data.index
+        calendar = calendar_fields(idx)
+        week_of_year = calendar['week_of_year']
+        month = calendar['month']
+        quarter = calendar['quarter']
+
+        cols = {
+            # Original value
+            'value': ts_data.to_numpy(),
+
+            # Time-based features
+            'week_of_year': week_of_year,
+            'month': month,
+            'quarter': quarter,
+            'day_of_week': calendar['day_of_week'],
+            'day_of_month': calendar['day_of_month'],
+            'is_month_start': calendar['is_month_start'],
+            'is_month_end': calendar['is_month_end'],
+            'is_quarter_start': calendar['is_quarter_start'],
+            'is_quarter_end': calendar['is_quarter_end'],
+
+            # Cyclical encoding for seasonality
+            'month_sin': np.sin(2 * np.pi * month / 12),
+            'month_cos': np.cos(2 * np.pi * month / 12),
+            'week_sin': np.sin(2 * np.pi * week_of_year / 52),
+            'week_cos': np.cos(2 * np.pi * week_of_year / 52),
+            'quarter_sin': np.sin(2 * np.pi * quarter / 4),
+            'quarter_cos': np.cos(2 * np.pi * quarter / 4),
+
+            # Trend (time index)
+            'time_index': np.arange(len(ts_data))
+        }
 
         # Lag features
+        arr = ts_data.to_numpy(dtype=np.float64)
         for lag in lag_periods:
-            df[f'lag_{lag}'] = ts_data.shift(lag)
+            cols[f'lag_{lag}'] = lagged(arr, lag)
 
         # Rolling statistics (multiple windows)
-        for window in [4, 8, 12, 16]:  # 4, 8, 12, 16 weeks
-            df[f'rolling_mean_{window}'] = ts_data.rolling(window=window, min_periods=1).mean()
-            df[f'rolling_std_{window}'] = ts_data.rolling(window=window, min_periods=1).std()
-            df[f'rolling_min_{window}'] = ts_data.rolling(window=window, min_periods=1).min()
-            df[f'rolling_max_{window}'] = ts_data.rolling(window=window, min_periods=1).max()
+        if HAS_BOTTLENECK:
+            # Bottleneck moving-window kernels: one C pass per statistic
+            for window in self.ROLLING_WINDOWS:
+                w = max(1, min(window, len(arr)))  # min_count=1 makes longer windows equivalent
+                cols[f'rolling_mean_{window}'] = bn.move_mean(arr, window=w, min_count=1)
+                cols[f'rolling_std_{window}'] = np.nan_to_num(bn.move_std(arr, window=w, min_count=1, ddof=1))
+                cols[f'rolling_min_{window}'] = bn.move_min(arr, window=w, min_count=1)
+                cols[f'rolling_max_{window}'] = bn.move_max(arr, window=w, min_count=1)
+        else:
+            for window in self.ROLLING_WINDOWS:
+                rolling = ts_data.rolling(window=window, min_periods=1)
+                cols[f'rolling_mean_{window}'] = rolling.mean().to_numpy()
+                cols[f'rolling_std_{window}'] = np.nan_to_num(rolling.std().to_numpy())
+                cols[f'rolling_min_{window}'] = rolling.min().to_numpy()
+                cols[f'rolling_max_{window}'] = rolling.max().to_numpy()
 
         # Exponentially weighted moving averages
-        df['ewm_4'] = ts_data.ewm(span=4, adjust=False).mean()
-        df['ewm_8'] = ts_data.ewm(span=8, adjust=False).mean()
-        df['ewm_12'] = ts_data.ewm(span=12, adjust=False).mean()
+        for span in self.EWM_SPANS:
+            cols[f'ewm_{span}'] = ts_data.ewm(span=span, adjust=False).mean().to_numpy()
 
         # Growth and momentum features
-        df['growth_rate'] = ts_data.pct_change()
-        df['growth_rate_4'] = ts_data.pct_change(periods=4)
-        df['acceleration'] = df['growth_rate'].diff()
+        growth_rate = pct_change(arr)
+        cols['growth_rate'] = growth_rate
+        cols['growth_rate_4'] = pct_change(arr, 4)
+        cols['acceleration'] = np.diff(growth_rate, prepend=growth_rate[:1])
 
-        # Differencing features
-        df['diff_1'] = ts_data.diff()
-        df['diff_4'] = ts_data.diff(periods=4)
+        # Differencing features (against the backfilled lags, so 0 at the start)
+        cols['diff_1'] = arr - lagged(arr, 1)
+        cols['diff_4'] = arr - lagged(arr, 4)
 
-        # Fill NaN values
-        df = df.fillna(method='bfill').fillna(0)
-
-        return df
+        return pd.DataFrame(cols, index=idx)
 
     def prepare_train_data(self, features_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -125,11 +162,12 @@ class XGBoostForecaster:
         Returns:
             X (features) and y (target) arrays
         """
-        # Target is the value column
-        y = features_df['value'].values
+        # Target is the value column (float32: XGBoost's native precision)
+        y = features_df['value'].to_numpy(dtype=np.float32)
 
-        # Features are everything except value
-        X = features_df.drop('value', axis=1).values
+        # Features are everything except value (row-major: the frame's block is
+        # column-major, and XGBoost's histogram build walks rows)
+        X = np.ascontiguousarray(features_df.drop('value', axis=1).to_numpy(dtype=np.float32))
 
         # Store feature names
         self.feature_names = [col for col in features_df.columns if col != 'value']
@@ -158,15 +196,96 @@ class XGBoostForecaster:
             max_depth=self.max_depth,
             learning_rate=self.learning_rate,
             objective='reg:squarederror',
+            tree_method='hist',
+            max_bin=256,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
 
         self.model.fit(X, y)
+        self._booster = self.model.get_booster()
+
+        # In-sample fit quality, reused for forecast intervals and the summary
+        predictions = self._booster.inplace_predict(X)
+        self._residual_std = float(np.std(y - predictions))
+        self._r2 = float(r2_score(y, predictions))
         self.is_fitted = True
 
         return self
 
+    def _init_feature_state(self, ts_data: pd.Series, steps: int = 0) -> dict:
+        """
+        Build the incremental feature state for a history
+
+        The value buffer has room for `steps` appended predictions so the
+        forecast loop never reallocates.
+        """
+        n = len(ts_data)
+        values = np.empty(n + steps, dtype=np.float64)
+        values[:n] = ts_data.to_numpy(dtype=np.float64)
+        n_features = 16 + len(self.LAG_PERIODS) + 4 * len(self.ROLLING_WINDOWS) + len(self.EWM_SPANS) + 5
+
+        return {
+            'values': values,
+            'n': n,
+            'date': ts_data.index[-1].date(),
+            'ewm': np.array([ts_data.ewm(span=span, adjust=False).mean().iloc[-1]
+                             for span in self.EWM_SPANS], dtype=np.float64),
+            'alphas': 2.0 / (np.asarray(self.EWM_SPANS, dtype=np.float64) + 1.0),
+            'lags': np.asarray(self.LAG_PERIODS, dtype=np.int64),
+            'windows': np.asarray(self.ROLLING_WINDOWS, dtype=np.int64),
+            'row': np.empty((1, n_features), dtype=np.float32)
+        }
+
+    def _incremental_features(self, state: dict, new_value: Optional[float] = None) -> np.ndarray:
+        """
+        Feature row of the last period, optionally after appending a new value
+
+        Equivalent to the last row of engineer_features() on the extended
+        series, but only touches the trailing window instead of the full history.
+
+        Args:
+            state: State from _init_feature_state (updated in place)
+            new_value: Value for the week after the current last date
+
+        Returns:
+            (1, n_features) float32 feature row (reused buffer)
+        """
+        if new_value is not None:
+            state['values'][state['n']] = new_value
+            state['n'] += 1
+            state['date'] = state['date'] + timedelta(weeks=1)
+            update_ewm(state['ewm'], state['alphas'], new_value)
+
+        n = state['n']
+        row = state['row'][0]
+
+        # Time-based and cyclical features (calendar ints extracted once per step)
+        week, month, quarter, day_of_week, day, is_month_end, is_quarter_end = \
+            step_calendar(state['date'])
+        row[0] = week
+        row[1] = month
+        row[2] = quarter
+        row[3] = day_of_week
+        row[4] = day
+        row[5] = day == 1
+        row[6] = is_month_end
+        row[7] = day == 1 and month % 3 == 1
+        row[8] = is_quarter_end
+        row[9] = np.sin(2 * np.pi * month / 12)
+        row[10] = np.cos(2 * np.pi * month / 12)
+        row[11] = np.sin(2 * np.pi * week / 52)
+        row[12] = np.cos(2 * np.pi * week / 52)
+        row[13] = np.sin(2 * np.pi * quarter / 4)
+        row[14] = np.cos(2 * np.pi * quarter / 4)
+        row[15] = n - 1
+
+        # Lags, rolling statistics, EWMs, growth and differencing in one compiled step
+        step_xgboost_features(state['values'], n, state['lags'], state['windows'],
+                              state['ewm'], row, 16)
+
+        return state['row']
+
     def forecast(self,
                 ts_data: pd.Series,
                 steps: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -183,40 +302,26 @@ class XGBoostForecaster:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before forecasting")
 
-        forecasts = []
-        extended_data = ts_data.copy()
+        forecasts = np.empty(steps)
+        state = self._init_feature_state(ts_data, steps)
+        last_features = self._incremental_features(state)
 
-        # Iteratively forecast each step
+        # Iteratively forecast each step, updating only the newest feature row
         for step in range(steps):
-            # Engineer features for current data
-            features_df = self.engineer_features(extended_data)
-
-            # Get last row features
-            last_features = features_df.iloc[-1:].drop('value', axis=1).values
-
-            # Predict
-            prediction = self.model.predict(last_features)[0]
+            # Predict (inplace_predict skips DMatrix construction for the 1xF row)
+            prediction = float(self._booster.inplace_predict(last_features)[0])
 
             # Ensure non-negative
             prediction = max(0, prediction)
 
-            forecasts.append(prediction)
+            forecasts[step] = prediction
 
-            # Add prediction to extended data for next iteration
-            next_date = extended_data.index[-1] + timedelta(weeks=1)
-            extended_data = pd.concat([
-                extended_data,
-                pd.Series([prediction], index=[next_date])
-            ])
+            # Add prediction to the history for the next iteration
+            if step < steps - 1:
+                last_features = self._incremental_features(state, prediction)
 
-        forecasts = np.array(forecasts)
-
-        # Calculate prediction intervals based on historical error
-        features_df = self.engineer_features(ts_data)
-        X, y = self.prepare_train_data(features_df)
-        predictions = self.model.predict(X)
-        residuals = y - predictions
-        std_error = np.std(residuals)
+        # Prediction intervals from the standard deviation of the training residuals
+        std_error = self._residual_std
 
         # 80% confidence interval (1.28 std devs)
         lower_bound = forecasts - (1.28 * std_error)
@@ -252,7 +357,8 @@ class XGBoostForecaster:
             'n_estimators': self.n_estimators,
             'max_depth': self.max_depth,
             'learning_rate': self.learning_rate,
-            'n_features': len(self.feature_names)
+            'n_features': len(self.feature_names),
+            'r2_score': self._r2
         }
 
 
@@ -264,7 +370,8 @@ class MultiCategoryXGBoostForecaster:
     def __init__(self,
                  n_estimators: int = 100,
                  max_depth: int = 5,
-                 learning_rate: float = 0.1):
+                 learning_rate: float = 0.1,
+                 n_jobs: int = -1):
         """
         Initialize multi-category forecaster
 
@@ -272,10 +379,12 @@ class MultiCategoryXGBoostForecaster:
             n_estimators: Number of boosting rounds
             max_depth: Maximum tree depth
             learning_rate: Learning rate
+            n_jobs: XGBoost threads per model fitted by fit_category (-1 = all cores)
         """
         self.n_estimators = n_estimators
         self.max_depth = max_depth
         self.learning_rate = learning_rate
+        self.n_jobs = n_jobs
         self.category_models = {}
         self.category_data = {}
 
@@ -306,14 +415,31 @@ class MultiCategoryXGBoostForecaster:
         # Set index
         cat_data = cat_data.set_index('date')
 
-        # Resample
-        ts = cat_data['amount'].resample(frequency).sum()
-
-        # Fill missing
-        ts = ts.fillna(0)
+        # Resample (float32 halves the traffic; empty periods sum to 0)
+        ts = cat_data['amount'].astype(np.float32).resample(frequency).sum(min_count=0)
 
         return ts
 
+    def prepare_all_category_data(self,
+                                  transactions_df: pd.DataFrame,
+                                  categories: List[str],
+                                  frequency: str = 'W') -> Dict[str, pd.Series]:
+        """
+        Prepare time series for several categories in one pass
+
+        Equivalent to calling prepare_category_data for each category, but the
+        dates are parsed and the table grouped once instead of per category.
+
+        Args:
+            transactions_df: Transaction DataFrame
+            categories: Category names
+            frequency: Resampling frequency
+
+        Returns:
+            Dictionary of time series by category (empty for unknown categories)
+        """
+        return resample_categories(transactions_df, categories, frequency)
+
     def fit_category(self,
                     transactions_df: pd.DataFrame,
                     category: str,
@@ -331,26 +457,43 @@ class MultiCategoryXGBoostForecaster:
         """
         # Prepare data
         ts = self.prepare_category_data(transactions_df, category, frequency)
+        forecaster = self._fit_category_model(ts, category, self.n_jobs)
 
-        if len(ts) < 12:  # Need minimum data
+        if forecaster is None:
             return False
 
+        self.category_models[category] = forecaster
+        self.category_data[category] = ts
+
+        return True
+
+    def _fit_category_model(self,
+                            ts: pd.Series,
+                            category: str,
+                            n_jobs: int = -1) -> Optional[XGBoostForecaster]:
+        """
+        Fit a model on a prepared category series without storing it
+
+        Returns:
+            Fitted forecaster, or None if the fit was skipped or failed
+        """
+        if len(ts) < 12:  # Need minimum data
+            return None
+
         try:
             # Fit model
             forecaster = XGBoostForecaster(
                 n_estimators=self.n_estimators,
                 max_depth=self.max_depth,
-                learning_rate=self.learning_rate
+                learning_rate=self.learning_rate,
+                n_jobs=n_jobs
             )
             forecaster.fit(ts)
 
-            self.category_models[category] = forecaster
-            self.category_data[category] = ts
-
-            return True
+            return forecaster
         except Exception as e:
             print(f"Failed to fit XGBoost for {category}: {e}")
-            return False
+            return None
 
     def fit_all_categories(self,
                           transactions_df: pd.DataFrame,
@@ -367,11 +510,21 @@ class MultiCategoryXGBoostForecaster:
         Returns:
             Dictionary with fit results
         """
+        category_data = self.prepare_all_category_data(transactions_df, categories, frequency)
+
+        # Categories are independent: fit them concurrently, one XGBoost thread each
+        fitted = Parallel(n_jobs=-1, backend='loky')(
+            delayed(self._fit_category_model)(category_data[category], category, 1)
+            for category in categories
+        )
+
         results = {}
 
-        for category in categories:
-            success = self.fit_category(transactions_df, category, frequency)
-            results[category] = success
+        for category, forecaster in zip(categories, fitted):
+            if forecaster is not None:
+                self.category_models[category] = forecaster
+                self.category_data[category] = category_data[category]
+            results[category] = forecaster is not None
 
         return results
 
@@ -401,6 +554,9 @@ class MultiCategoryXGBoostForecaster:
                 'forecast': forecast.tolist(),
                 'lower_bound': lower.tolist(),
                 'upper_bound': upper.tolist(),
+                'forecast_arr': forecast,
+                'lower_arr': lower,
+                'upper_arr': upper,
                 'category': category,
                 'model_info': forecaster.get_model_summary()
             }
@@ -418,14 +574,7 @@ class MultiCategoryXGBoostForecaster:
         Returns:
             Dictionary of forecasts
         """
-        forecasts = {}
-
-        for category in self.category_models.keys():
-            forecast_result = self.forecast_category(category, steps)
-            if forecast_result:
-                forecasts[category] = forecast_result
-
-        return forecasts
+        return forecast_categories(self.forecast_category, list(self.category_models.keys()), steps)
 
 
 if __name__ == "__main__":
@@ -3,12 +3,21 @@ Data Models for Cash Flow Forecasting
 Core data structures used throughout the system
 """
 
+import json
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 
 class TransactionType(Enum):
     """Transaction direction"""
@@ -39,7 +48,21 @@ class CashFlowCategory(Enum):
     OTHER_EXPENSES = "other_expenses"
 
 
-@dataclass
+# Per-record classes are created by the thousand; __slots__ drops the per-instance
+# __dict__ where dataclass supports it (Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+# Integer codes for the columnar transaction arrays (position in enum order)
+_CATEGORY_CODES = {category: code for code, category in enumerate(CashFlowCategory)}
+_TYPE_CODES = {txn_type: code for code, txn_type in enumerate(TransactionType)}
+
+# Shared dtypes of the category / transaction_type DataFrame columns (same code order)
+_CATEGORY_DTYPE = pd.CategoricalDtype([category.value for category in CashFlowCategory])
+_TYPE_DTYPE = pd.CategoricalDtype([txn_type.value for txn_type in TransactionType])
+
+
+@dataclass(**_SLOTS)
 class Transaction:
     """Individual transaction record"""
     date: datetime
@@ -75,31 +98,149 @@ class HistoricalData:
     end_date: datetime
     opening_balance: float
 
+    # Columnar (structure-of-arrays) view of the transactions, built on first use
+    # from the list object (and length) recorded in _source
+    _source: Optional[Tuple[list, int]] = field(default=None, init=False, repr=False, compare=False)
+    _dates: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _amounts: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _categories: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _types: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _frame: Optional[pd.DataFrame] = field(default=None, init=False, repr=False, compare=False)
+    _positions: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    # Aggregations memoized by DataProcessor.aggregate_by_category (cleared on rebuild)
+    _agg_cache: Dict[str, tuple] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def invalidate(self):
+        """
+        Drop the columnar arrays and everything derived from them
+
+        Replacing the transactions list is detected automatically; call this
+        after editing the list or its transactions in place.
+        """
+        self._source = None
+
+    def _build_arrays(self):
+        """Fill the columnar arrays (rebuilt if the transactions list was replaced or resized)"""
+        txns = self.transactions
+        n = len(txns)
+        if self._source is not None and self._source[0] is txns and self._source[1] == n:
+            return
+
+        self._dates = np.fromiter((txn.date for txn in txns), dtype='datetime64[ns]', count=n)
+        self._amounts = np.fromiter((txn.amount for txn in txns), dtype=np.float64, count=n)
+        self._categories = np.fromiter(
+            (_CATEGORY_CODES[txn.category] for txn in txns), dtype=np.int8, count=n
+        )
+        self._types = np.fromiter(
+            (_TYPE_CODES[txn.transaction_type] for txn in txns), dtype=np.int8, count=n
+        )
+        self._frame = None
+        self._positions = None
+        self._agg_cache.clear()
+        self._source = (txns, n)
+
+    def as_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Columnar view of the transactions (shared arrays, do not modify)
+
+        Returns:
+            Tuple of (dates as datetime64[ns] with NaT for missing dates,
+            float64 amounts, int8 category codes, int8 transaction type codes);
+            codes are positions in the CashFlowCategory / TransactionType enums
+        """
+        self._build_arrays()
+        return self._dates, self._amounts, self._categories, self._types
+
+    def subset(self,
+               mask: np.ndarray,
+               start_date: Optional[datetime] = None,
+               end_date: Optional[datetime] = None) -> 'HistoricalData':
+        """
+        New HistoricalData with the transactions selected by a boolean mask
+
+        The columnar arrays are sliced rather than rebuilt from the objects.
+        Dates default to this object's range.
+        """
+        self._build_arrays()
+        index = np.flatnonzero(mask)
+        txns = self.transactions
+
+        subset = HistoricalData(
+            transactions=[txns[i] for i in index.tolist()],
+            start_date=self.start_date if start_date is None else start_date,
+            end_date=self.end_date if end_date is None else end_date,
+            opening_balance=self.opening_balance
+        )
+        subset._dates = self._dates[index]
+        subset._amounts = self._amounts[index]
+        subset._categories = self._categories[index]
+        subset._types = self._types[index]
+        subset._source = (subset.transactions, index.shape[0])
+
+        return subset
+
     def to_dataframe(self) -> pd.DataFrame:
-        """Convert transactions to pandas DataFrame"""
-        data = []
-        for txn in self.transactions:
-            data.append({
-                'date': txn.date,
-                'amount': txn.amount,
-                'category': txn.category.value,
-                'transaction_type': txn.transaction_type.value,
-                'description': txn.description,
-                'customer': txn.customer,
-                'vendor': txn.vendor
+        """
+        Convert transactions to pandas DataFrame
+
+        Columns are built from the columnar arrays (category and
+        transaction_type as Categoricals); the frame is cached and callers get
+        a shallow copy they can add columns to.
+        """
+        self._build_arrays()
+
+        if self._frame is None:
+            txns = self.transactions
+            self._frame = pd.DataFrame({
+                'date': self._dates,
+                'amount': self._amounts,
+                'category': pd.Categorical.from_codes(self._categories, dtype=_CATEGORY_DTYPE),
+                'transaction_type': pd.Categorical.from_codes(self._types, dtype=_TYPE_DTYPE),
+                'description': [txn.description for txn in txns],
+                'customer': [txn.customer for txn in txns],
+                'vendor': [txn.vendor for txn in txns]
             })
-        return pd.DataFrame(data)
+
+        return self._frame.copy(deep=False)
+
+    def _group_positions(self) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Positions of the transactions of each category and of each type,
+        indexed by code (built once, then shared by the filters below)
+        """
+        self._build_arrays()
+
+        if self._positions is None:
+            self._positions = (
+                _split_positions(self._categories, len(_CATEGORY_CODES)),
+                _split_positions(self._types, len(_TYPE_CODES))
+            )
+
+        return self._positions
 
     def get_category_transactions(self, category: CashFlowCategory) -> List[Transaction]:
         """Get all transactions for a specific category"""
-        return [txn for txn in self.transactions if txn.category == category]
+        txns = self.transactions
+        return [txns[i] for i in self._group_positions()[0][_CATEGORY_CODES[category]].tolist()]
+
+    def get_category_amounts(self, category: CashFlowCategory) -> np.ndarray:
+        """Amounts of the transactions in a specific category, in transaction order"""
+        return self._amounts[self._group_positions()[0][_CATEGORY_CODES[category]]]
 
     def get_transactions_by_type(self, txn_type: TransactionType) -> List[Transaction]:
         """Get all transactions of a specific type"""
-        return [txn for txn in self.transactions if txn.transaction_type == txn_type]
+        txns = self.transactions
+        return [txns[i] for i in self._group_positions()[1][_TYPE_CODES[txn_type]].tolist()]
 
 
-@dataclass
+def _split_positions(codes: np.ndarray, n_codes: int) -> List[np.ndarray]:
+    """Positions of each code's entries (ascending), for codes 0 .. n_codes-1"""
+    order = np.argsort(codes, kind='stable')
+    return np.split(order, np.cumsum(np.bincount(codes, minlength=n_codes))[:-1])
+
+
+@dataclass(**_SLOTS)
 class CategoryForecast:
     """Forecast for a single category"""
     category: CashFlowCategory
@@ -109,7 +250,7 @@ class CategoryForecast:
     volatility: float
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ForecastPoint:
     """Single point in time forecast"""
     date: datetime
@@ -133,6 +274,13 @@ class ForecastPoint:
         }
 
 
+# ForecastPoint value fields, in to_dict order (after the date)
+_POINT_FIELDS = (
+    'predicted_balance', 'confidence_lower', 'confidence_upper',
+    'predicted_inflows', 'predicted_outflows', 'net_cash_flow'
+)
+
+
 @dataclass
 class Forecast:
     """Complete cash flow forecast"""
@@ -142,6 +290,18 @@ class Forecast:
     forecast_points: List[ForecastPoint]
     model_accuracy: Optional[float] = None
 
+    def _point_values(self) -> np.ndarray:
+        """
+        Point values as a (points x fields) float64 matrix in _POINT_FIELDS order
+
+        Built from the points on every call (13-52 rows), so edits to the
+        points are always reflected.
+        """
+        return np.array(
+            [[getattr(point, name) for name in _POINT_FIELDS] for point in self.forecast_points],
+            dtype=np.float64
+        ).reshape(len(self.forecast_points), len(_POINT_FIELDS))
+
     def get_final_balance(self) -> float:
         """Get predicted balance at end of forecast period"""
         return self.forecast_points[-1].predicted_balance if self.forecast_points else self.current_balance
@@ -150,25 +310,25 @@ class Forecast:
         """Get minimum predicted balance during forecast period"""
         if not self.forecast_points:
             return self.current_balance
-        return min(point.predicted_balance for point in self.forecast_points)
+        return float(self._point_values()[:, 0].min())
 
     def get_weeks_until_zero(self) -> Optional[int]:
         """Get number of weeks until cash runs out (None if never)"""
-        for i, point in enumerate(self.forecast_points):
-            if point.predicted_balance <= 0:
-                return i + 1
-        return None
+        depleted = self._point_values()[:, 0] <= 0
+        return int(np.argmax(depleted)) + 1 if depleted.any() else None
 
     def get_average_weekly_burn(self) -> float:
         """Calculate average weekly burn rate (negative means profit)"""
         if not self.forecast_points:
             return 0
 
-        total_net = sum(point.net_cash_flow for point in self.forecast_points)
-        return -total_net / len(self.forecast_points)
+        return -float(self._point_values()[:, 5].sum()) / len(self.forecast_points)
 
     def to_dict(self) -> dict:
         """Convert to dictionary"""
+        # One rounding pass over every point value instead of per-point round() calls
+        rounded = np.round(self._point_values(), 2).tolist()
+
         return {
             'company_name': self.company_name,
             'forecast_date': self.forecast_date.isoformat(),
@@ -178,9 +338,18 @@ class Forecast:
             'weeks_until_zero': self.get_weeks_until_zero(),
             'average_weekly_burn': round(self.get_average_weekly_burn(), 2),
             'model_accuracy': round(self.model_accuracy, 2) if self.model_accuracy else None,
-            'forecast_points': [point.to_dict() for point in self.forecast_points]
+            'forecast_points': [
+                {'date': point.date.isoformat(), **dict(zip(_POINT_FIELDS, row))}
+                for point, row in zip(self.forecast_points, rounded)
+            ]
         }
 
+    def to_json(self) -> bytes:
+        """to_dict() serialized as UTF-8 JSON (with orjson when installed)"""
+        if HAS_ORJSON:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict()).encode('utf-8')
+
 
 @dataclass
 class Scenario:
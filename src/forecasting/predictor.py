@@ -4,16 +4,69 @@ Category-Based Forecasting
 Predicts each cash flow category separately using appropriate methods
 """
 
+import os
 import numpy as np
-import pandas as pd
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
+from joblib import Memory, Parallel, delayed
 from .models import (
     HistoricalData, CategoryForecast, CashFlowCategory
 )
 from .processor import DataProcessor
+from ._ets_kernels import (
+    HAS_NUMBA, ALPHAS, BETA_SHARES, PHIS, damped_holt_forecast, damped_holt_optimize
+)
+
+
+# Weekly amounts of a category with no transactions
+_EMPTY_VALUES = np.empty(0)
+
+# Fitted ETS parameters, memoized on disk by the input series so that repeated
+# forecasts of unchanged data (e.g. scenario runs) skip the fit; only worth it
+# when the kernels run interpreted
+_ETS_CACHE = Memory(location='.finly_cache', verbose=0)
+
+
+def _fit_ets(values: np.ndarray) -> Tuple[float, float, float]:
+    """(alpha, beta, phi) of the damped-trend Holt model fitted to a weekly series"""
+    return damped_holt_optimize(values, ALPHAS, BETA_SHARES, PHIS)
+
+
+if not HAS_NUMBA:
+    _fit_ets = _ETS_CACHE.cache(_fit_ets)
+
+
+# Standard AR collection patterns (can be learned from historical data): share
+# of each aging bucket collected in weeks 1-4; week 4's rate repeats after that
+_AR_BUCKETS = ('0-30', '31-45', '46-60', '60+')
+_AR_BUCKET_INDEX = {bucket: i for i, bucket in enumerate(_AR_BUCKETS)}
+_COLLECTION_PATTERNS = np.array([
+    [0.30, 0.40, 0.20, 0.10],
+    [0.20, 0.40, 0.30, 0.10],
+    [0.10, 0.30, 0.40, 0.20],
+    [0.05, 0.15, 0.30, 0.30],
+    [0.25, 0.05, 0.05, 0.05],  # Buckets not listed above
+])
+
+
+def _linfit(y: np.ndarray) -> Tuple[float, float, np.ndarray]:
+    """
+    Closed-form least-squares line through y against the week index 0 .. n-1
+    
+    Returns:
+        Tuple of (slope, intercept, fitted values)
+    """
+    n = y.shape[0]
+    x = np.arange(n, dtype=np.float64)
+    
+    # Moments of the week index are known in closed form: mean (n-1)/2, sum of
+    # squared deviations n(n^2-1)/12; deviations sum to 0, so y needs no centering
+    x_mean = (n - 1) / 2
+    sxx = n * (n * n - 1) / 12
+    slope = float((x - x_mean) @ y / sxx) if sxx > 0 else 0.0
+    intercept = float(y.mean() - slope * x_mean)
+    
+    return slope, intercept, intercept + slope * x
 
 
 class CategoryPredictor:
@@ -38,20 +91,145 @@ class CategoryPredictor:
             CategoryForecast object with predictions
         """
         # Get aggregated data for this category
-        df = self.processor.aggregate_by_category(historical_data, 'W')
-        cat_df = df[df['category'] == category.value].copy()
+        values = self._category_values(historical_data, [category])[0]
         
-        if len(cat_df) < 4:
+        return self._predict_from_values(values, category, weeks_ahead)
+    
+    def _predict_from_values(self, values: np.ndarray,
+                             category: CashFlowCategory,
+                             weeks_ahead: int,
+                             trending: Optional[bool] = None) -> CategoryForecast:
+        """
+        predict_category on a category's already aggregated weekly amounts
+        
+        trending, when given, replaces the _has_trend check.
+        """
+        if len(values) < 4:
             # Insufficient data, use simple average
-            return self._predict_simple_average(cat_df, category, weeks_ahead)
+            return self._predict_simple_average(values, category, weeks_ahead)
         
         # Choose prediction method based on category characteristics
         if self._is_fixed_category(category):
-            return self._predict_fixed(cat_df, category, weeks_ahead)
-        elif self._has_trend(cat_df):
-            return self._predict_with_trend(cat_df, category, weeks_ahead)
+            return self._predict_fixed(values, category, weeks_ahead)
+        
+        if trending is None:
+            trending = self._has_trend(values)
+        
+        if trending:
+            return self._predict_with_trend(values, category, weeks_ahead)
         else:
-            return self._predict_exponential_smoothing(cat_df, category, weeks_ahead)
+            return self._predict_exponential_smoothing(values, category, weeks_ahead)
+    
+    def predict_all(self, historical_data: HistoricalData,
+                    categories: List[CashFlowCategory],
+                    weeks_ahead: int = 13) -> Dict[CashFlowCategory, CategoryForecast]:
+        """
+        Predict several categories from one aggregation pass
+        
+        Same forecasts as calling predict_category for each category, but the
+        weekly series are stacked into one (categories x weeks) matrix and the
+        trend screen runs for all of them at once.
+        
+        Args:
+            historical_data: Historical transaction data
+            categories: Categories to predict
+            weeks_ahead: Number of weeks to forecast
+            
+        Returns:
+            Dictionary of CategoryForecast by category
+        """
+        series, trending = self._screen_categories(historical_data, categories)
+        
+        return {
+            category: self._predict_from_values(series[i], category, weeks_ahead, bool(trending[i]))
+            for i, category in enumerate(categories)
+        }
+    
+    def predict_all_parallel(self, historical_data: HistoricalData,
+                             categories: List[CashFlowCategory],
+                             weeks_ahead: int = 13,
+                             n_jobs: int = -1) -> Dict[CashFlowCategory, CategoryForecast]:
+        """
+        predict_all with the per-category forecasts spread over worker processes
+        
+        Aggregation and the trend screen run once here; each worker gets only
+        its category's weekly amounts. Worth it when the per-category fits are
+        slow (the ETS kernels running interpreted, without numba); with them
+        compiled, process start-up usually outweighs the fits.
+        
+        Args:
+            historical_data: Historical transaction data
+            categories: Categories to predict
+            weeks_ahead: Number of weeks to forecast
+            n_jobs: Worker processes (-1 = all cores)
+            
+        Returns:
+            Dictionary of CategoryForecast by category
+        """
+        n_workers = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+        if min(n_workers, len(categories)) <= 1:
+            return self.predict_all(historical_data, categories, weeks_ahead)
+        
+        series, trending = self._screen_categories(historical_data, categories)
+        
+        forecasts = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(self._predict_from_values)(series[i], category, weeks_ahead, bool(trending[i]))
+            for i, category in enumerate(categories)
+        )
+        
+        return dict(zip(categories, forecasts))
+    
+    def _category_values(self, historical_data: HistoricalData,
+                         categories: List[CashFlowCategory]) -> List[np.ndarray]:
+        """
+        Weekly amounts of each category as float64 arrays
+        
+        The only pandas step: the _predict_* helpers work on these arrays.
+        """
+        by_category = self.processor.aggregate_by_category_split(historical_data, 'W')
+        return [
+            by_category[category.value]['amount'].to_numpy(dtype=np.float64)
+            if category.value in by_category else _EMPTY_VALUES
+            for category in categories
+        ]
+    
+    def _screen_categories(self, historical_data: HistoricalData,
+                           categories: List[CashFlowCategory]) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Weekly amounts of each category and its trend flag, from one aggregation pass"""
+        series = self._category_values(historical_data, categories)
+        
+        # Each category keeps its own weeks: left-aligned rows, padded past its length
+        lengths = np.array([len(values) for values in series], dtype=np.int64)
+        padded = np.zeros((len(series), int(lengths.max(initial=0))))
+        for i, values in enumerate(series):
+            padded[i, :lengths[i]] = values
+        
+        return series, self._trend_mask(padded, lengths)
+    
+    @staticmethod
+    def _trend_mask(values: np.ndarray, lengths: np.ndarray,
+                    threshold: float = 0.05) -> np.ndarray:
+        """
+        _has_trend for every row of a left-aligned, padded (series x weeks) matrix
+        
+        Least-squares slope against the week index, relative to the row mean.
+        """
+        n = lengths.astype(np.float64)
+        valid = np.arange(values.shape[1]) < lengths[:, None]
+        safe_n = np.maximum(n, 1.0)
+        
+        x = np.arange(values.shape[1], dtype=np.float64) - ((n - 1) / 2)[:, None]
+        y = np.where(valid, values, 0.0)
+        mean = y.sum(axis=1) / safe_n
+        
+        # Padding is zeroed in y, and the index deviations sum to 0 over each
+        # row's weeks, so neither needs masking or centering; sxx is closed-form
+        sxy = (x * y).sum(axis=1)
+        sxx = n * (n * n - 1) / 12
+        slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+        
+        trend_pct = np.abs(np.divide(slope, mean, out=np.zeros_like(slope), where=mean != 0))
+        return (lengths >= 4) & (trend_pct > threshold)
     
     def _is_fixed_category(self, category: CashFlowCategory) -> bool:
         """Check if category typically has fixed costs"""
@@ -61,35 +239,31 @@ class CategoryPredictor:
         }
         return category in fixed_categories
     
-    def _has_trend(self, df: pd.DataFrame, threshold: float = 0.05) -> bool:
+    def _has_trend(self, values: np.ndarray, threshold: float = 0.05) -> bool:
         """Check if data has significant trend"""
-        if len(df) < 4:
+        if len(values) < 4:
             return False
         
         # Simple linear regression to detect trend
-        X = np.arange(len(df)).reshape(-1, 1)
-        y = df['amount'].values
-        
-        model = LinearRegression()
-        model.fit(X, y)
+        slope, _, _ = _linfit(values)
         
         # Check if slope is significant relative to mean
-        slope = model.coef_[0]
-        mean_value = y.mean()
+        mean_value = values.mean()
         
         trend_pct = abs(slope / mean_value) if mean_value != 0 else 0
         return trend_pct > threshold
     
-    def _predict_simple_average(self, df: pd.DataFrame, 
+    def _predict_simple_average(self, values: np.ndarray, 
                                 category: CashFlowCategory,
                                 weeks_ahead: int) -> CategoryForecast:
         """Simple average prediction for categories with little data"""
-        if len(df) == 0:
+        if len(values) == 0:
             avg = 0
             std = 0
         else:
-            avg = df['amount'].mean()
-            std = df['amount'].std()
+            avg = values.mean()
+            # Sample standard deviation, undefined (NaN) for a single week
+            std = values.std(ddof=1) if len(values) > 1 else np.nan
         
         predictions = [avg] * weeks_ahead
         
@@ -101,13 +275,13 @@ class CategoryPredictor:
             volatility=std / avg if avg != 0 else 0
         )
     
-    def _predict_fixed(self, df: pd.DataFrame,
+    def _predict_fixed(self, values: np.ndarray,
                       category: CashFlowCategory,
                       weeks_ahead: int) -> CategoryForecast:
         """Predict fixed costs (constant amount)"""
         # Use median for fixed costs (more robust to outliers)
-        median_value = df['amount'].median()
-        std = df['amount'].std()
+        median_value = np.median(values)
+        std = values.std(ddof=1)
         
         predictions = [median_value] * weeks_ahead
         
@@ -119,31 +293,22 @@ class CategoryPredictor:
             volatility=0.1  # Very low volatility
         )
     
-    def _predict_with_trend(self, df: pd.DataFrame,
+    def _predict_with_trend(self, y: np.ndarray,
                            category: CashFlowCategory,
                            weeks_ahead: int) -> CategoryForecast:
         """Predict using linear regression for trending data"""
-        # Prepare data
-        X = np.arange(len(df)).reshape(-1, 1)
-        y = df['amount'].values
-        
         # Fit linear model
-        model = LinearRegression()
-        model.fit(X, y)
-        
-        # Make predictions
-        future_X = np.arange(len(df), len(df) + weeks_ahead).reshape(-1, 1)
-        predictions = model.predict(future_X)
+        slope, intercept, fitted = _linfit(y)
         
-        # Ensure non-negative predictions
-        predictions = np.maximum(predictions, 0)
+        # Make predictions, ensuring they are non-negative
+        future_x = np.arange(len(y), len(y) + weeks_ahead)
+        predictions = np.maximum(intercept + slope * future_x, 0)
         
         # Calculate confidence interval
-        residuals = y - model.predict(X)
+        residuals = y - fitted
         std = np.std(residuals)
         
         # Determine trend direction
-        slope = model.coef_[0]
         if slope > 0.01 * y.mean():
             trend = 'increasing'
         elif slope < -0.01 * y.mean():
@@ -159,44 +324,32 @@ class CategoryPredictor:
             volatility=std / y.mean() if y.mean() != 0 else 0
         )
     
-    def _predict_exponential_smoothing(self, df: pd.DataFrame,
+    def _predict_exponential_smoothing(self, values: np.ndarray,
                                       category: CashFlowCategory,
                                       weeks_ahead: int) -> CategoryForecast:
         """Predict using exponential smoothing"""
-        values = df['amount'].values
+        # Summary statistics, each computed once
+        mean = values.mean()
+        std = np.sqrt(np.square(values - mean).mean())
         
         try:
-            # Try exponential smoothing with trend
-            model = ExponentialSmoothing(
-                values,
-                trend='add',
-                seasonal=None,
-                damped_trend=True
-            )
-            fitted_model = model.fit()
-            predictions = fitted_model.forecast(steps=weeks_ahead)
+            # Try exponential smoothing with damped trend
+            alpha, beta, phi = _fit_ets(values)
+            predictions = damped_holt_forecast(values, alpha, beta, phi, weeks_ahead)
             
             # Ensure non-negative
             predictions = np.maximum(predictions, 0)
             
         except Exception as e:
-            # Fallback to simple exponential smoothing
+            # Fallback to simple exponential smoothing toward the mean:
+            # last <- alpha * last + (1 - alpha) * mean, in closed form
             alpha = 0.3
-            predictions = []
-            last_value = values[-1]
-            
-            for _ in range(weeks_ahead):
-                predictions.append(last_value)
-                last_value = alpha * last_value + (1 - alpha) * values.mean()
-        
-        # Calculate statistics
-        std = np.std(values)
-        mean = np.mean(values)
+            predictions = mean + (values[-1] - mean) * alpha ** np.arange(weeks_ahead)
         
         # Determine trend
         if len(values) >= 4:
-            recent_mean = np.mean(values[-4:])
-            early_mean = np.mean(values[:4])
+            recent_mean = values[-4:].mean()
+            early_mean = values[:4].mean()
             if recent_mean > early_mean * 1.1:
                 trend = 'increasing'
             elif recent_mean < early_mean * 0.9:
@@ -208,7 +361,7 @@ class CategoryPredictor:
         
         return CategoryForecast(
             category=category,
-            weekly_predictions=predictions if isinstance(predictions, list) else predictions.tolist(),
+            weekly_predictions=predictions.tolist(),
             confidence_interval=std,
             trend=trend,
             volatility=std / mean if mean != 0 else 0
@@ -230,33 +383,18 @@ class CategoryPredictor:
         Returns:
             CategoryForecast for AR collections
         """
-        # Standard collection patterns (can be learned from historical data)
-        collection_patterns = {
-            '0-30': {'week_1': 0.30, 'week_2': 0.40, 'week_3': 0.20, 'week_4': 0.10},
-            '31-45': {'week_1': 0.20, 'week_2': 0.40, 'week_3': 0.30, 'week_4': 0.10},
-            '46-60': {'week_1': 0.10, 'week_2': 0.30, 'week_3': 0.40, 'week_4': 0.20},
-            '60+': {'week_1': 0.05, 'week_2': 0.15, 'week_3': 0.30, 'week_4': 0.30}
-        }
+        # Existing AR per pattern row (unlisted buckets share the last row)
+        balances = np.zeros(len(_COLLECTION_PATTERNS))
+        for bucket, balance in ar_aging.items():
+            balances[_AR_BUCKET_INDEX.get(bucket, len(_AR_BUCKETS))] += balance
         
-        predictions = []
+        # Collections from existing AR in weeks 1-4, week 4's repeating after that
+        per_week = balances @ _COLLECTION_PATTERNS
+        week_index = np.minimum(np.arange(weeks_ahead), per_week.shape[0] - 1)
         
-        # Project AR collections for each week
-        for week in range(weeks_ahead):
-            week_collection = 0
-            
-            # Collections from existing AR
-            for bucket, balance in ar_aging.items():
-                pattern = collection_patterns.get(bucket, {'week_1': 0.25})
-                week_key = f'week_{min(week + 1, 4)}'
-                collection_rate = pattern.get(week_key, 0.05)
-                week_collection += balance * collection_rate
-            
-            # Add collections from new invoices (based on revenue forecast)
-            # This is a simplification - in production, would integrate with revenue forecast
-            new_invoice_collection = current_ar_balance * 0.05
-            week_collection += new_invoice_collection
-            
-            predictions.append(week_collection)
+        # Add collections from new invoices (based on revenue forecast)
+        # This is a simplification - in production, would integrate with revenue forecast
+        predictions = (per_week[week_index] + current_ar_balance * 0.05).tolist()
         
         # Calculate confidence interval based on historical volatility
         std = np.std(predictions) * 0.3  # AR typically less volatile
@@ -287,20 +425,19 @@ class EnsemblePredictor:
         - Exponential smoothing
         - Historical average
         """
+        # Both methods work from the same weekly amounts of this category
+        values = self.category_predictor._category_values(historical_data, [category])[0]
+        
         # Get predictions from multiple methods
         predictions_list = []
         
         # Method 1: Category predictor (primary)
-        forecast1 = self.category_predictor.predict_category(
-            historical_data, category, weeks_ahead
-        )
+        forecast1 = self.category_predictor._predict_from_values(values, category, weeks_ahead)
         predictions_list.append(forecast1.weekly_predictions)
         
         # Method 2: Simple moving average
-        df = DataProcessor().aggregate_by_category(historical_data, 'W')
-        cat_df = df[df['category'] == category.value]
-        if len(cat_df) >= 4:
-            ma = cat_df['amount'].tail(4).mean()
+        if len(values) >= 4:
+            ma = values[-4:].mean()
             predictions_list.append([ma] * weeks_ahead)
         
         # Average predictions
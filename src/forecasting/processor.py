@@ -6,12 +6,20 @@ Handles data validation, cleaning, and aggregation
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from .models import (
-    HistoricalData, Transaction, TransactionType, CashFlowCategory
+    HistoricalData, Transaction, TransactionType, CashFlowCategory,
+    _CATEGORY_DTYPE, _TYPE_DTYPE
 )
 
 
+# Day-based pandas frequencies bucketed directly on day numbers: (days per period,
+# offset that puts period starts on multiples of it, label day within the period).
+# 'W' bins Monday-Sunday weeks labelled by their Sunday (1970-01-01 was a Thursday,
+# so Mondays are 3 days off the week grid); 'D' bins calendar days.
+_DAY_PERIODS = {'W': (7, 3, 6), 'D': (1, 0, 0)}
+
+
 class DataProcessor:
     """Processes and validates transaction data"""
 
@@ -36,23 +44,19 @@ class DataProcessor:
         if date_range < 30:
             issues.append("Insufficient date range: Need at least 30 days of history")
 
+        negative, missing, out_of_range = self._invalid_masks(historical_data)
+
         # Check for negative amounts
-        negative_amounts = [txn for txn in historical_data.transactions if txn.amount < 0]
-        if negative_amounts:
-            issues.append(f"Found {len(negative_amounts)} transactions with negative amounts")
+        if negative.any():
+            issues.append(f"Found {int(negative.sum())} transactions with negative amounts")
 
         # Check for missing dates
-        missing_dates = [txn for txn in historical_data.transactions if txn.date is None]
-        if missing_dates:
-            issues.append(f"Found {len(missing_dates)} transactions with missing dates")
+        if missing.any():
+            issues.append(f"Found {int(missing.sum())} transactions with missing dates")
 
         # Check date consistency
-        out_of_range = [
-            txn for txn in historical_data.transactions
-            if txn.date < historical_data.start_date or txn.date > historical_data.end_date
-        ]
-        if out_of_range:
-            issues.append(f"Found {len(out_of_range)} transactions outside date range")
+        if out_of_range.any():
+            issues.append(f"Found {int(out_of_range.sum())} transactions outside date range")
 
         return len(issues) == 0, issues
 
@@ -66,25 +70,23 @@ class DataProcessor:
         Returns:
             Cleaned HistoricalData object
         """
-        cleaned_transactions = []
+        negative, missing, out_of_range = self._invalid_masks(historical_data)
 
-        for txn in historical_data.transactions:
-            # Skip invalid transactions
-            if txn.amount < 0:
-                continue
-            if txn.date is None:
-                continue
-            if txn.date < historical_data.start_date or txn.date > historical_data.end_date:
-                continue
+        # Skip invalid transactions
+        return historical_data.subset(~(negative | missing | out_of_range))
 
-            cleaned_transactions.append(txn)
+    @staticmethod
+    def _invalid_masks(historical_data: HistoricalData) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Boolean masks of negative amounts, missing dates and dates outside the data range"""
+        dates, amounts, _, _ = historical_data.as_arrays()
 
-        return HistoricalData(
-            transactions=cleaned_transactions,
-            start_date=historical_data.start_date,
-            end_date=historical_data.end_date,
-            opening_balance=historical_data.opening_balance
+        missing = np.isnat(dates)
+        out_of_range = (
+            (dates < np.datetime64(historical_data.start_date, 'ns'))
+            | (dates > np.datetime64(historical_data.end_date, 'ns'))
         )
+        # NaT never compares as out of range; missing dates are reported separately
+        return amounts < 0, missing, out_of_range
 
     def aggregate_by_category(self,
                              historical_data: HistoricalData,
@@ -99,22 +101,85 @@ class DataProcessor:
         Returns:
             DataFrame with aggregated data
         """
-        df = historical_data.to_dataframe()
+        return self._aggregate(historical_data, frequency)[0].copy(deep=False)
 
-        if df.empty:
-            return pd.DataFrame(columns=['date', 'category', 'amount', 'transaction_type'])
+    def aggregate_by_category_split(self,
+                                    historical_data: HistoricalData,
+                                    frequency: str = 'W') -> Dict[str, pd.DataFrame]:
+        """
+        Aggregated rows of each category, keyed by category value
 
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.set_index('date')
+        Same rows as filtering aggregate_by_category on the category column;
+        categories without transactions are absent. The frames are shared
+        between calls and must not be modified.
+        """
+        return self._aggregate(historical_data, frequency)[1]
+
+    def _aggregate(self,
+                   historical_data: HistoricalData,
+                   frequency: str) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        """Group once per (data, frequency) and memoize the result on the data"""
+        # Rebuilding the arrays (transactions replaced or invalidated) clears the memo
+        historical_data._build_arrays()
+        cached = historical_data._agg_cache.get(frequency)
+        if cached is not None:
+            return cached
+
+        if not historical_data.transactions:
+            grouped = pd.DataFrame(columns=['date', 'category', 'amount', 'transaction_type'])
+        elif frequency in _DAY_PERIODS:
+            grouped = self._group_numpy(historical_data, frequency)
+        else:
+            df = historical_data.to_dataframe()
+            df['date'] = pd.to_datetime(df['date'])
+            df = df.set_index('date')
+
+            # Group by category and time period
+            grouped = df.groupby([
+                pd.Grouper(freq=frequency),
+                'category',
+                'transaction_type'
+            ], observed=True)['amount'].sum().reset_index()
+
+        by_category = {
+            category: rows
+            for category, rows in grouped.groupby('category', observed=True, sort=False)
+        }
 
-        # Group by category and time period
-        grouped = df.groupby([
-            pd.Grouper(freq=frequency),
-            'category',
-            'transaction_type'
-        ])['amount'].sum().reset_index()
+        historical_data._agg_cache[frequency] = (grouped, by_category)
+        return grouped, by_category
 
-        return grouped
+    @staticmethod
+    def _group_numpy(historical_data: HistoricalData, frequency: str) -> pd.DataFrame:
+        """
+        The pandas Grouper aggregation for day-based periods, computed with numpy
+
+        Each (period, category, type) group gets one integer key, laid out so
+        that sorted keys follow the pandas row order; one bincount sums them.
+        """
+        dates, amounts, categories, types = historical_data.as_arrays()
+        period_days, offset, label_day = _DAY_PERIODS[frequency]
+        has_date = ~np.isnat(dates)
+        n_types = len(_TYPE_DTYPE.categories)
+        n_combos = len(_CATEGORY_DTYPE.categories) * n_types
+
+        days = dates[has_date].astype('datetime64[D]').astype(np.int64)
+        period = (days + offset) // period_days
+        first = period.min()
+        combo = categories[has_date].astype(np.int64) * n_types + types[has_date]
+        key = (period - first) * n_combos + combo
+
+        size = int(key.max()) + 1
+        sums = np.bincount(key, weights=amounts[has_date], minlength=size)
+        present = np.flatnonzero(np.bincount(key, minlength=size))
+
+        period_start = (present // n_combos + first) * period_days - offset
+        return pd.DataFrame({
+            'date': (period_start + label_day).astype('datetime64[D]').astype('datetime64[ns]'),
+            'category': pd.Categorical.from_codes(present % n_combos // n_types, dtype=_CATEGORY_DTYPE),
+            'transaction_type': pd.Categorical.from_codes(present % n_types, dtype=_TYPE_DTYPE),
+            'amount': sums[present]
+        })
 
     def get_category_stats(self,
                           historical_data: HistoricalData,
@@ -129,9 +194,9 @@ class DataProcessor:
         Returns:
             Dictionary with statistics
         """
-        transactions = historical_data.get_category_transactions(category)
+        amounts = historical_data.get_category_amounts(category)
 
-        if not transactions:
+        if amounts.size == 0:
             return {
                 'count': 0,
                 'total': 0,
@@ -142,16 +207,14 @@ class DataProcessor:
                 'max': 0
             }
 
-        amounts = [txn.amount for txn in transactions]
-
         return {
-            'count': len(amounts),
-            'total': sum(amounts),
-            'mean': np.mean(amounts),
+            'count': int(amounts.size),
+            'total': float(amounts.sum()),
+            'mean': amounts.mean(),
             'median': np.median(amounts),
-            'std': np.std(amounts),
-            'min': min(amounts),
-            'max': max(amounts)
+            'std': amounts.std(),
+            'min': float(amounts.min()),
+            'max': float(amounts.max())
         }
 
     def detect_seasonality(self,
@@ -167,10 +230,9 @@ class DataProcessor:
         Returns:
             True if seasonality detected
         """
-        df = self.aggregate_by_category(historical_data, 'W')
-        cat_df = df[df['category'] == category.value]
+        cat_df = self.aggregate_by_category_split(historical_data, 'W').get(category.value)
 
-        if len(cat_df) < 8:  # Need at least 8 weeks
+        if cat_df is None or len(cat_df) < 8:  # Need at least 8 weeks
             return False
 
         # Simple seasonality detection: compare variance of week-to-week changes
@@ -200,28 +262,13 @@ class DataProcessor:
         """
         split_date = historical_data.end_date - timedelta(weeks=test_weeks)
 
-        train_transactions = [
-            txn for txn in historical_data.transactions
-            if txn.date <= split_date
-        ]
-
-        test_transactions = [
-            txn for txn in historical_data.transactions
-            if txn.date > split_date
-        ]
-
-        train_data = HistoricalData(
-            transactions=train_transactions,
-            start_date=historical_data.start_date,
-            end_date=split_date,
-            opening_balance=historical_data.opening_balance
-        )
+        dates = historical_data.as_arrays()[0]
+        is_train = dates <= np.datetime64(split_date, 'ns')
+        is_test = dates > np.datetime64(split_date, 'ns')
 
-        test_data = HistoricalData(
-            transactions=test_transactions,
-            start_date=split_date + timedelta(days=1),
-            end_date=historical_data.end_date,
-            opening_balance=historical_data.opening_balance  # Should calculate actual balance at split
-        )
+        train_data = historical_data.subset(is_train, end_date=split_date)
+
+        # Keeps the original opening balance (should calculate actual balance at split)
+        test_data = historical_data.subset(is_test, start_date=split_date + timedelta(days=1))
 
         return train_data, test_data
@@ -5,9 +5,45 @@ Handles secure authentication with QuickBooks Online API
 
 import os
 import json
+import threading
 from typing import Optional, Dict
 from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlencode
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _json_loads(data: bytes):
+    """Decode a JSON document (with orjson when installed)"""
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+def _new_session():
+    """
+    HTTPS session with a keep-alive connection pool, retrying throttled (429)
+    and transient server errors with backoff
+
+    Only idempotent methods are retried; token requests (POST) are not.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False  # Hand the last response back to the status check
+    )
+
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+    return session
 
 
 class QuickBooksAuth:
@@ -41,6 +77,16 @@ class QuickBooksAuth:
         self.token_file = Path.home() / '.finly' / 'qb_tokens.json'
         self.token_file.parent.mkdir(exist_ok=True)
 
+        # Pooled HTTP session, shared with clients built on this auth
+        self._session = _new_session()
+
+        # Tokens and their parsed expiry, kept in memory after the first read
+        self._cached_tokens: Optional[Dict[str, str]] = None
+        self._cached_expiry: Optional[datetime] = None
+
+        # Serializes token refreshes when requests run on several threads
+        self._token_lock = threading.Lock()
+
     def _get_base_url(self) -> str:
         """Get base URL based on environment"""
         if self.environment == 'production':
@@ -67,8 +113,7 @@ class QuickBooksAuth:
             'state': state
         }
 
-        query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-        return f"{self.auth_url}?{query_string}"
+        return f"{self.auth_url}?{urlencode(params)}"
 
     def _generate_state(self) -> str:
         """Generate random state for CSRF protection"""
@@ -85,7 +130,6 @@ class QuickBooksAuth:
         Returns:
             Dictionary with access_token and refresh_token
         """
-        import requests
         from requests.auth import HTTPBasicAuth
 
         data = {
@@ -94,7 +138,7 @@ class QuickBooksAuth:
             'redirect_uri': self.redirect_uri
         }
 
-        response = requests.post(
+        response = self._session.post(
             self.token_url,
             auth=HTTPBasicAuth(self.client_id, self.client_secret),
             data=data,
@@ -104,7 +148,7 @@ class QuickBooksAuth:
         if response.status_code != 200:
             raise Exception(f"Token exchange failed: {response.text}")
 
-        tokens = response.json()
+        tokens = _json_loads(response.content)
 
         # Add expiry timestamp
         tokens['expires_at'] = (
@@ -123,16 +167,17 @@ class QuickBooksAuth:
         Returns:
             Valid access token
         """
-        tokens = self._load_tokens()
+        with self._token_lock:
+            tokens = self._load_tokens()
 
-        if not tokens:
-            raise Exception("No tokens found. Please authenticate first.")
+            if not tokens:
+                raise Exception("No tokens found. Please authenticate first.")
 
-        # Check if token is expired
-        if self._is_token_expired(tokens):
-            tokens = self.refresh_access_token(tokens['refresh_token'])
+            # Check if token is expired
+            if self._is_token_expired(tokens):
+                tokens = self.refresh_access_token(tokens['refresh_token'])
 
-        return tokens['access_token']
+            return tokens['access_token']
 
     def refresh_access_token(self, refresh_token: str) -> Dict[str, str]:
         """
@@ -144,7 +189,6 @@ class QuickBooksAuth:
         Returns:
             New tokens
         """
-        import requests
         from requests.auth import HTTPBasicAuth
 
         data = {
@@ -152,7 +196,7 @@ class QuickBooksAuth:
             'refresh_token': refresh_token
         }
 
-        response = requests.post(
+        response = self._session.post(
             self.token_url,
             auth=HTTPBasicAuth(self.client_id, self.client_secret),
             data=data,
@@ -162,7 +206,7 @@ class QuickBooksAuth:
         if response.status_code != 200:
             raise Exception(f"Token refresh failed: {response.text}")
 
-        tokens = response.json()
+        tokens = _json_loads(response.content)
         tokens['expires_at'] = (
             datetime.now() + timedelta(seconds=tokens['expires_in'])
         ).isoformat()
@@ -172,27 +216,48 @@ class QuickBooksAuth:
         return tokens
 
     def _save_tokens(self, tokens: Dict[str, str]):
-        """Save tokens to secure storage"""
-        with open(self.token_file, 'w') as f:
-            json.dump(tokens, f, indent=2)
+        """Save tokens to secure storage (compact JSON; the file is only machine-read)"""
+        if HAS_ORJSON:
+            self.token_file.write_bytes(orjson.dumps(tokens))
+        else:
+            self.token_file.write_text(json.dumps(tokens, separators=(',', ':')))
 
         # Set restrictive permissions
         os.chmod(self.token_file, 0o600)
 
+        self._cache_tokens(tokens)
+
     def _load_tokens(self) -> Optional[Dict[str, str]]:
-        """Load tokens from storage"""
+        """Load tokens from storage (read from disk once, then from memory)"""
+        if self._cached_tokens is not None:
+            return self._cached_tokens
+
         if not self.token_file.exists():
             return None
 
-        with open(self.token_file, 'r') as f:
-            return json.load(f)
+        tokens = _json_loads(self.token_file.read_bytes())
+
+        self._cache_tokens(tokens)
+        return tokens
+
+    def _cache_tokens(self, tokens: Optional[Dict[str, str]]):
+        """Keep tokens in memory with their expiry parsed once"""
+        self._cached_tokens = tokens
+        self._cached_expiry = (
+            datetime.fromisoformat(tokens['expires_at'])
+            if tokens and 'expires_at' in tokens else None
+        )
 
     def _is_token_expired(self, tokens: Dict[str, str]) -> bool:
         """Check if access token is expired"""
-        if 'expires_at' not in tokens:
+        if tokens is self._cached_tokens:
+            expiry = self._cached_expiry
+        else:
+            expiry = datetime.fromisoformat(tokens['expires_at']) if 'expires_at' in tokens else None
+
+        if expiry is None:
             return True
 
-        expiry = datetime.fromisoformat(tokens['expires_at'])
         # Add 5 minute buffer
         return datetime.now() >= (expiry - timedelta(minutes=5))
 
@@ -201,11 +266,10 @@ class QuickBooksAuth:
         tokens = self._load_tokens()
 
         if tokens:
-            import requests
             from requests.auth import HTTPBasicAuth
 
             # Revoke refresh token
-            requests.post(
+            self._session.post(
                 'https://developer.api.intuit.com/v2/oauth2/tokens/revoke',
                 auth=HTTPBasicAuth(self.client_id, self.client_secret),
                 data={'token': tokens['refresh_token']},
@@ -216,6 +280,8 @@ class QuickBooksAuth:
         if self.token_file.exists():
             self.token_file.unlink()
 
+        self._cache_tokens(None)
+
     def is_authenticated(self) -> bool:
         """Check if user is authenticated"""
         tokens = self._load_tokens()
@@ -3,10 +3,72 @@ QuickBooks API Client
 Retrieves transaction data from QuickBooks Online
 """
 
-import requests
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from .auth import QuickBooksAuth
+import re
+import time
+import numpy as np
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .auth import QuickBooksAuth, _json_loads, _new_session
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+
+# Most payloads the QuickBooks Batch API accepts in one request
+MAX_BATCH_ITEMS = 30
+
+# Rows requested per query page (the most QuickBooks returns for one query)
+QUERY_PAGE_SIZE = 1000
+
+# Concurrent requests used to fetch the pages of a long query result
+PAGE_WORKERS = 4
+
+# Rewrites a row query into the COUNT(*) query for the same rows
+_SELECT_ALL = re.compile(r'^\s*SELECT\s+\*\s+', re.IGNORECASE)
+_ORDER_BY = re.compile(r'\s+ORDER\s*BY\s+.*$', re.IGNORECASE | re.DOTALL)
+
+
+# Transaction query of an entity within a date range, oldest first
+_TXN_QUERY = "SELECT * FROM {entity} WHERE TxnDate >= '{start}' AND TxnDate <= '{end}'{condition} ORDERBY TxnDate"
+
+# Extra predicate (appended to _TXN_QUERY) of each transaction type get_transactions combines
+_TXN_CONDITIONS = {
+    'Invoice': '',
+    'Payment': '',
+    'Bill': '',
+    'BillPayment': '',
+    'Purchase': " AND PaymentType = 'Cash'"
+}
+
+
+def _fmt_date(d) -> str:
+    """
+    YYYY-MM-DD of a date or datetime, for use as a query literal
+
+    ISO slicing is much cheaper than strftime; anything that is not a date
+    (datetime included) is rejected before reaching a query.
+    """
+    if not isinstance(d, date):
+        raise ValueError(f"Invalid query date: {d!r}")
+    return d.isoformat()[:10]
+
+
+def _sum_field(items: Iterable[Dict], field: str) -> float:
+    """Sum of a numeric field over rows (missing values count as 0), accumulated by numpy"""
+    return float(np.fromiter((float(item.get(field, 0)) for item in items), dtype=np.float64).sum())
+
+
+def _paged(query: str, position: int, page_size: int) -> str:
+    """Query restricted to page_size rows starting at (1-based) position"""
+    return f"{query} STARTPOSITION {position} MAXRESULTS {page_size}"
+
+# AR aging buckets and the first day past due of each bucket after the first
+AGING_BUCKETS = ('0-30', '31-45', '46-60', '60+')
+AGING_EDGES = np.array([31, 46, 61])
 
 
 class QuickBooksClient:
@@ -26,13 +88,29 @@ class QuickBooksClient:
         self.company_id = company_id
         self.base_url = f"{self.auth.base_url}/v3/company"
 
+        # Reuse the auth's pooled connections (token and API hosts share it)
+        self._session = getattr(self.auth, '_session', None) or _new_session()
+
+        # Request headers, rebuilt only when the access token changes
+        self._headers: Optional[Dict[str, str]] = None
+        self._headers_token: Optional[str] = None
+
+        # Fetched data (company info, lists, transactions) with the time it expires
+        self._cache: Dict[Any, Tuple[float, Any]] = {}
+
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers with auth token"""
-        return {
-            'Authorization': f'Bearer {self.auth.get_access_token()}',
-            'Accept': 'application/json',
-            'Content-Type': 'application/json'
-        }
+        token = self.auth.get_access_token()
+
+        if token != self._headers_token:
+            self._headers = {
+                'Authorization': f'Bearer {token}',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            }
+            self._headers_token = token
+
+        return self._headers
 
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """
@@ -47,7 +125,7 @@ class QuickBooksClient:
         """
         url = f"{self.base_url}/{self.company_id}/{endpoint}"
 
-        response = requests.get(
+        response = self._session.get(
             url,
             headers=self._get_headers(),
             params=params
@@ -56,11 +134,192 @@ class QuickBooksClient:
         if response.status_code != 200:
             raise Exception(f"API request failed: {response.status_code} - {response.text}")
 
-        return response.json()
+        return _json_loads(response.content)
+
+    def _cached(self, key: Any, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """
+        Result of fetch(), reused for ttl seconds under key
+
+        Cached values are shared between callers and must not be modified.
+        """
+        return self._cached_batch({key: key}, ttl, lambda missing: {key: fetch()})[key]
+
+    def _cached_batch(self, keys: Dict[Any, Any], ttl: float,
+                      fetch: Callable[[List[Any]], Dict[Any, Any]]) -> Dict[Any, Any]:
+        """
+        Values of several names, each reused for ttl seconds under its cache key
+
+        fetch gets the names whose entries are missing or expired and returns
+        their values by name; storing them also evicts every expired entry, so
+        keys that are never asked for again do not accumulate. Cached values
+        are shared between callers and must not be modified.
+        """
+        now = time.monotonic()
+        cache = self._cache
+        missing = [name for name, key in keys.items() if key not in cache or cache[key][0] <= now]
+
+        if missing:
+            values = fetch(missing)
+            for key in [key for key, (expires, _) in cache.items() if expires <= now]:
+                del cache[key]
+            expires = now + ttl
+            for name in missing:
+                cache[keys[name]] = (expires, values[name])
+
+        return {name: cache[key][1] for name, key in keys.items()}
+
+    def _query_all(self, query: str, entity: str, page_size: int = QUERY_PAGE_SIZE) -> List[Dict]:
+        """
+        All rows of a query, across as many pages as it takes
+
+        The first page is fetched on its own; only when it comes back full are
+        the remaining rows counted and their pages fetched concurrently.
+
+        Args:
+            query: Query string (without STARTPOSITION / MAXRESULTS)
+            entity: Entity name the rows are listed under in QueryResponse
+            page_size: Rows per request
+        """
+        rows = self._query_page(query, entity, 1, page_size)
+
+        if len(rows) == page_size:
+            rows.extend(self._remaining_pages(query, entity, page_size))
+
+        return rows
+
+    def _query_page(self, query: str, entity: str, position: int, page_size: int) -> List[Dict]:
+        """One page of a query's rows"""
+        result = self._make_request('query', params={'query': _paged(query, position, page_size)})
+        return result.get('QueryResponse', {}).get(entity, [])
+
+    def _remaining_pages(self, query: str, entity: str, page_size: int) -> List[Dict]:
+        """Rows after a full first page: count them, then fetch their pages concurrently"""
+        count_query = _ORDER_BY.sub('', _SELECT_ALL.sub('SELECT COUNT(*) ', query))
+        result = self._make_request('query', params={'query': count_query})
+        total = int(result.get('QueryResponse', {}).get('totalCount', 0))
+
+        positions = list(range(page_size + 1, total + 1, page_size))
+        rows = []
+        last_full = True
+
+        if positions:
+            with ThreadPoolExecutor(max_workers=min(PAGE_WORKERS, len(positions))) as ex:
+                pages = list(ex.map(lambda position: self._query_page(query, entity, position, page_size),
+                                    positions))
+            for page in pages:
+                rows.extend(page)
+            last_full = len(pages[-1]) == page_size
+
+        # Rows added since the count: keep paging until a page comes back short
+        position = (len(positions) + 1) * page_size + 1
+        while last_full:
+            page = self._query_page(query, entity, position, page_size)
+            rows.extend(page)
+            last_full = len(page) == page_size
+            position += page_size
+
+        return rows
+
+    def _iter_query(self, query: str, entity: str, page_size: int = QUERY_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        All rows of a query, yielded as they are parsed
+
+        With ijson installed each page's response body is streamed and decoded
+        one row at a time, so aggregations never hold the full result;
+        otherwise the rows come from the decoded pages. Pages are fetched in
+        sequence, each only after the previous one was consumed.
+
+        Args:
+            query: Query string (without STARTPOSITION / MAXRESULTS)
+            entity: Entity name the rows are listed under in QueryResponse
+            page_size: Rows per request
+        """
+        position = 1
+
+        while True:
+            count = 0
+            for row in self._iter_page(query, entity, position, page_size):
+                count += 1
+                yield row
+
+            if count < page_size:
+                return
+            position += page_size
+
+    def _iter_page(self, query: str, entity: str, position: int, page_size: int) -> Iterator[Dict]:
+        """One page of a query's rows, streamed through ijson when available"""
+        if not HAS_IJSON:
+            yield from self._query_page(query, entity, position, page_size)
+            return
+
+        url = f"{self.base_url}/{self.company_id}/query"
+        params = {'query': _paged(query, position, page_size)}
+
+        with self._session.get(url, headers=self._get_headers(), params=params, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"API request failed: {response.status_code} - {response.text}")
+
+            response.raw.decode_content = True  # Undo gzip transfer encoding
+            yield from ijson.items(response.raw, f'QueryResponse.{entity}.item', use_float=True)
+
+    def _batch_query(self, queries: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        Run several queries through the Batch API (one request per MAX_BATCH_ITEMS)
+
+        Each query returns its first QUERY_PAGE_SIZE rows from the batch; the
+        rest of a longer result is paged in afterwards.
+
+        Args:
+            queries: Query strings keyed by the entity they select (also the batch ID)
+
+        Returns:
+            QueryResponse of each query, keyed by entity
+        """
+        url = f"{self.base_url}/{self.company_id}/batch"
+        items = list(queries.items())
+        results = {}
+
+        for i in range(0, len(items), MAX_BATCH_ITEMS):
+            payload = {
+                'BatchItemRequest': [
+                    {'bId': entity, 'Query': _paged(query, 1, QUERY_PAGE_SIZE)}
+                    for entity, query in items[i:i + MAX_BATCH_ITEMS]
+                ]
+            }
+
+            response = self._session.post(url, headers=self._get_headers(), json=payload)
+
+            if response.status_code != 200:
+                raise Exception(f"API request failed: {response.status_code} - {response.text}")
+
+            for item in _json_loads(response.content).get('BatchItemResponse', []):
+                if 'Fault' in item:
+                    raise Exception(f"Batch query {item.get('bId')} failed: {item['Fault']}")
+                results[item['bId']] = item.get('QueryResponse', {})
+
+        for entity, result in results.items():
+            rows = result.get(entity, [])
+            if len(rows) == QUERY_PAGE_SIZE:
+                rows.extend(self._remaining_pages(queries[entity], entity, QUERY_PAGE_SIZE))
+
+        return results
+
+    def _txn_query(self, entity: str, start_date: datetime, end_date: datetime) -> str:
+        """Query for an entity's transactions within a date range, oldest first"""
+        return _TXN_QUERY.format(entity=entity, start=_fmt_date(start_date), end=_fmt_date(end_date),
+                                 condition=_TXN_CONDITIONS.get(entity, ''))
+
+    def _txn_queries(self, start_date: datetime, end_date: datetime) -> Dict[str, str]:
+        """Queries of the five transaction types get_transactions combines, keyed by entity"""
+        start, end = _fmt_date(start_date), _fmt_date(end_date)
+        return {
+            entity: _TXN_QUERY.format(entity=entity, start=start, end=end, condition=condition)
+            for entity, condition in _TXN_CONDITIONS.items()
+        }
 
     def get_company_info(self) -> Dict:
-        """Get company information"""
-        return self._make_request('companyinfo/1')
+        """Get company information (cached for an hour)"""
+        return self._cached('company_info', 3600, lambda: self._make_request('companyinfo/1'))
 
     def get_transactions(self,
                         start_date: Optional[datetime] = None,
@@ -80,20 +339,14 @@ class QuickBooksClient:
         end_date = end_date or datetime.now()
         start_date = start_date or (end_date - timedelta(days=days))
 
-        # Get different transaction types
-        invoices = self.get_invoices(start_date, end_date)
-        payments = self.get_payments(start_date, end_date)
-        bills = self.get_bills(start_date, end_date)
-        bill_payments = self.get_bill_payments(start_date, end_date)
-        expenses = self.get_expenses(start_date, end_date)
+        # Get different transaction types in one batch request
+        queries = self._txn_queries(start_date, end_date)
+        responses = self._batch_query(queries)
 
         # Combine all transactions
         all_transactions = []
-        all_transactions.extend(invoices)
-        all_transactions.extend(payments)
-        all_transactions.extend(bills)
-        all_transactions.extend(bill_payments)
-        all_transactions.extend(expenses)
+        for entity in queries:
+            all_transactions.extend(responses.get(entity, {}).get(entity, []))
 
         # Sort by date
         all_transactions.sort(key=lambda x: x.get('TxnDate', ''))
@@ -104,122 +357,70 @@ class QuickBooksClient:
                     start_date: datetime,
                     end_date: datetime) -> List[Dict]:
         """Get invoices within date range"""
-        query = f"""
-            SELECT * FROM Invoice
-            WHERE TxnDate >= '{start_date.strftime('%Y-%m-%d')}'
-            AND TxnDate <= '{end_date.strftime('%Y-%m-%d')}'
-            ORDERBY TxnDate
-        """
+        query = self._txn_query('Invoice', start_date, end_date)
 
-        result = self._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Invoice', [])
+        return self._query_all(query, 'Invoice')
 
     def get_payments(self,
                     start_date: datetime,
                     end_date: datetime) -> List[Dict]:
         """Get payments within date range"""
-        query = f"""
-            SELECT * FROM Payment
-            WHERE TxnDate >= '{start_date.strftime('%Y-%m-%d')}'
-            AND TxnDate <= '{end_date.strftime('%Y-%m-%d')}'
-            ORDERBY TxnDate
-        """
+        query = self._txn_query('Payment', start_date, end_date)
 
-        result = self._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Payment', [])
+        return self._query_all(query, 'Payment')
 
     def get_bills(self,
                  start_date: datetime,
                  end_date: datetime) -> List[Dict]:
         """Get bills within date range"""
-        query = f"""
-            SELECT * FROM Bill
-            WHERE TxnDate >= '{start_date.strftime('%Y-%m-%d')}'
-            AND TxnDate <= '{end_date.strftime('%Y-%m-%d')}'
-            ORDERBY TxnDate
-        """
+        query = self._txn_query('Bill', start_date, end_date)
 
-        result = self._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Bill', [])
+        return self._query_all(query, 'Bill')
 
     def get_bill_payments(self,
                          start_date: datetime,
                          end_date: datetime) -> List[Dict]:
         """Get bill payments within date range"""
-        query = f"""
-            SELECT * FROM BillPayment
-            WHERE TxnDate >= '{start_date.strftime('%Y-%m-%d')}'
-            AND TxnDate <= '{end_date.strftime('%Y-%m-%d')}'
-            ORDERBY TxnDate
-        """
+        query = self._txn_query('BillPayment', start_date, end_date)
 
-        result = self._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('BillPayment', [])
+        return self._query_all(query, 'BillPayment')
 
     def get_expenses(self,
                     start_date: datetime,
                     end_date: datetime) -> List[Dict]:
         """Get expenses within date range"""
-        query = f"""
-            SELECT * FROM Purchase
-            WHERE TxnDate >= '{start_date.strftime('%Y-%m-%d')}'
-            AND TxnDate <= '{end_date.strftime('%Y-%m-%d')}'
-            AND PaymentType = 'Cash'
-            ORDERBY TxnDate
-        """
+        query = self._txn_query('Purchase', start_date, end_date)
 
-        result = self._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Purchase', [])
+        return self._query_all(query, 'Purchase')
 
     def get_accounts_receivable(self) -> Dict:
         """Get current accounts receivable balance and aging"""
         # Get AR aging report
         query = "SELECT * FROM Invoice WHERE Balance > '0'"
-        result = self._make_request('query', params={'query': query})
+        invoices = self._iter_query(query, 'Invoice')
 
-        invoices = result.get('QueryResponse', {}).get('Invoice', [])
+        # Only the balance and due date of each invoice are kept
+        rows = [(float(invoice.get('Balance', 0)), invoice['DueDate']) for invoice in invoices]
+        balances = np.array([balance for balance, _ in rows], dtype=np.float64)
+        due_dates = np.array([due for _, due in rows], dtype='datetime64[D]')
 
         # Calculate aging buckets
-        today = datetime.now()
-        aging = {
-            '0-30': 0,
-            '31-45': 0,
-            '46-60': 0,
-            '60+': 0
-        }
-
-        total_ar = 0
-
-        for invoice in invoices:
-            balance = float(invoice.get('Balance', 0))
-            total_ar += balance
-
-            due_date = datetime.strptime(invoice['DueDate'], '%Y-%m-%d')
-            days_past_due = (today - due_date).days
-
-            if days_past_due <= 30:
-                aging['0-30'] += balance
-            elif days_past_due <= 45:
-                aging['31-45'] += balance
-            elif days_past_due <= 60:
-                aging['46-60'] += balance
-            else:
-                aging['60+'] += balance
+        days_past_due = (np.datetime64(datetime.now().date()) - due_dates).astype(np.int64)
+        bucket_totals = np.bincount(
+            np.digitize(days_past_due, AGING_EDGES), weights=balances, minlength=len(AGING_BUCKETS)
+        )
 
         return {
-            'total_balance': total_ar,
-            'aging': aging
+            'total_balance': float(balances.sum()),
+            'aging': dict(zip(AGING_BUCKETS, bucket_totals.tolist()))
         }
 
     def get_accounts_payable(self) -> float:
         """Get current accounts payable balance"""
         query = "SELECT * FROM Bill WHERE Balance > '0'"
-        result = self._make_request('query', params={'query': query})
-
-        bills = result.get('QueryResponse', {}).get('Bill', [])
-        total_ap = sum(float(bill.get('Balance', 0)) for bill in bills)
+        bills = self._iter_query(query, 'Bill')
 
-        return total_ap
+        return _sum_field(bills, 'Balance')
 
     def get_cash_balance(self) -> float:
         """Get current cash/bank account balances"""
@@ -229,20 +430,15 @@ class QuickBooksClient:
             AND Active = true
         """
 
-        result = self._make_request('query', params={'query': query})
-        accounts = result.get('QueryResponse', {}).get('Account', [])
-
-        total_cash = sum(
-            float(account.get('CurrentBalance', 0))
-            for account in accounts
-        )
+        accounts = self._iter_query(query, 'Account')
 
-        return total_cash
+        return _sum_field(accounts, 'CurrentBalance')
 
     def test_connection(self) -> bool:
         """Test if connection to QuickBooks is working"""
         try:
-            self.get_company_info()
+            # Always a live request, never the cached company info
+            self._make_request('companyinfo/1')
             return True
         except Exception as e:
             print(f"Connection test failed: {e}")
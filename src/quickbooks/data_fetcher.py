@@ -3,10 +3,41 @@ QuickBooks Data Fetcher
 Enhanced functions for fetching specific data from QuickBooks
 """
 
-from typing import List, Dict, Optional
+import numpy as np
+from typing import Iterable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from .client import QuickBooksClient
+from .client import QuickBooksClient, _fmt_date, _sum_field
+
+
+# Seconds list and account data fetched from QuickBooks is reused for
+REFERENCE_TTL = 300
+
+# Seconds fetched transaction lists are reused for by the period summaries
+TRANSACTION_TTL = 60
+
+# Seconds the outstanding invoices behind the overdue and customer balance
+# lookups are reused for
+OUTSTANDING_TTL = 60
+
+# Balance group of each QuickBooks AccountType reported by get_account_balances_detailed
+_ACCOUNT_TYPE_MAP = {
+    'Bank': 'bank',
+    'Accounts Receivable': 'accounts_receivable',
+    'Accounts Payable': 'accounts_payable',
+    'Other Current Asset': 'other_current_assets',
+    'Fixed Asset': 'fixed_assets',
+    'Other Asset': 'other_assets',
+    'Credit Card': 'credit_card',
+    'Other Current Liability': 'current_liabilities',
+    'Long Term Liability': 'long_term_liabilities',
+    'Equity': 'equity'
+}
+
+# Invoice statuses get_all_invoices may filter on; the value is sent to the
+# query endpoint, so anything outside this set is rejected
+INVOICE_STATUSES = frozenset({'Paid', 'Unpaid', 'Pending'})
 
 
 class QuickBooksDataFetcher:
@@ -31,20 +62,25 @@ class QuickBooksDataFetcher:
         Get all invoices with optional filtering
 
         Args:
-            status: Filter by status ('Paid', 'Unpaid', 'Pending', etc.)
+            status: Filter by status (one of INVOICE_STATUSES)
             start_date: Filter by start date
             end_date: Filter by end date
 
         Returns:
             List of invoice dictionaries
         """
-        # Build query
+        if status and status not in INVOICE_STATUSES:
+            raise ValueError(f"Unknown invoice status: {status!r}")
+
+        # Build query (status filtered server-side)
         conditions = []
 
+        if status:
+            conditions.append(f"Status = '{status}'")
         if start_date:
-            conditions.append(f"TxnDate >= '{start_date.strftime('%Y-%m-%d')}'")
+            conditions.append(f"TxnDate >= '{_fmt_date(start_date)}'")
         if end_date:
-            conditions.append(f"TxnDate <= '{end_date.strftime('%Y-%m-%d')}'")
+            conditions.append(f"TxnDate <= '{_fmt_date(end_date)}'")
 
         where_clause = " AND ".join(conditions) if conditions else ""
 
@@ -55,14 +91,7 @@ class QuickBooksDataFetcher:
             query = "SELECT * FROM Invoice ORDERBY TxnDate DESC"
 
         # Execute query
-        result = self.client._make_request('query', params={'query': query})
-        invoices = result.get('QueryResponse', {}).get('Invoice', [])
-
-        # Filter by status if specified
-        if status:
-            invoices = [inv for inv in invoices if inv.get('Status') == status]
-
-        return invoices
+        return self.client._query_all(query, 'Invoice')
 
     def get_invoice_details(self, invoice_id: str) -> Dict:
         """
@@ -83,9 +112,7 @@ class QuickBooksDataFetcher:
         Returns:
             List of unpaid invoices
         """
-        query = "SELECT * FROM Invoice WHERE Balance > '0' ORDERBY DueDate"
-        result = self.client._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Invoice', [])
+        return list(self._outstanding()[0])
 
     def get_overdue_invoices(self) -> List[Dict]:
         """
@@ -94,10 +121,9 @@ class QuickBooksDataFetcher:
         Returns:
             List of overdue invoices
         """
-        today = datetime.now().strftime('%Y-%m-%d')
-        query = f"SELECT * FROM Invoice WHERE Balance > '0' AND DueDate < '{today}' ORDERBY DueDate"
-        result = self.client._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Invoice', [])
+        invoices, columns = self._outstanding()
+        overdue = np.flatnonzero(columns['due_date'] < np.datetime64(datetime.now().date()))
+        return [invoices[i] for i in overdue]
 
     def get_customer_balance(self, customer_id: str) -> float:
         """
@@ -109,12 +135,36 @@ class QuickBooksDataFetcher:
         Returns:
             Total balance
         """
-        query = f"SELECT * FROM Invoice WHERE CustomerRef = '{customer_id}' AND Balance > '0'"
-        result = self.client._make_request('query', params={'query': query})
-        invoices = result.get('QueryResponse', {}).get('Invoice', [])
+        columns = self._outstanding()[1]
+        return float(columns['balance'][columns['customer'] == str(customer_id)].sum())
+
+    def _outstanding(self) -> Tuple[List[Dict], np.ndarray]:
+        """
+        Invoices with an outstanding balance (by due date) and their columns
+
+        One query serves the outstanding, overdue and customer balance lookups,
+        which partition it in-process; the columns are a structured array of
+        each invoice's balance, due date and customer ID. Both are cached for
+        OUTSTANDING_TTL seconds and must not be modified.
+        """
+        return self.client._cached('outstanding_invoices', OUTSTANDING_TTL, self._fetch_outstanding)
+
+    def _fetch_outstanding(self) -> Tuple[List[Dict], np.ndarray]:
+        """Fetch the outstanding invoices and extract their columns"""
+        query = "SELECT * FROM Invoice WHERE Balance > '0' ORDERBY DueDate"
+        invoices = self.client._query_all(query, 'Invoice')
 
-        total_balance = sum(float(inv.get('Balance', 0)) for inv in invoices)
-        return total_balance
+        customers = [inv.get('CustomerRef', {}).get('value', '') for inv in invoices]
+        columns = np.empty(len(invoices), dtype=[
+            ('balance', np.float64),
+            ('due_date', 'datetime64[D]'),
+            ('customer', f'U{max(map(len, customers), default=1)}')
+        ])
+        columns['balance'] = [float(inv.get('Balance', 0)) for inv in invoices]
+        columns['due_date'] = [inv.get('DueDate', 'NaT') for inv in invoices]
+        columns['customer'] = customers
+
+        return invoices, columns
 
     def get_revenue_summary(self,
                            start_date: Optional[datetime] = None,
@@ -132,14 +182,17 @@ class QuickBooksDataFetcher:
         end_date = end_date or datetime.now()
         start_date = start_date or (end_date - timedelta(days=30))
 
-        # Get invoices
-        invoices = self.get_all_invoices(start_date=start_date, end_date=end_date)
-
-        # Get payments
-        payments = self.client.get_payments(start_date, end_date)
+        txns = self._fetch_transactions(start_date, end_date, ('Invoice', 'Payment'))
+        return self._revenue_summary(start_date, end_date, txns['Invoice'], txns['Payment'])
 
-        total_invoiced = sum(float(inv.get('TotalAmt', 0)) for inv in invoices)
-        total_collected = sum(float(pmt.get('TotalAmt', 0)) for pmt in payments)
+    @staticmethod
+    def _revenue_summary(start_date: datetime,
+                         end_date: datetime,
+                         invoices: List[Dict],
+                         payments: List[Dict]) -> Dict:
+        """Revenue metrics of already fetched invoices and payments"""
+        total_invoiced = _sum_field(invoices, 'TotalAmt')
+        total_collected = _sum_field(payments, 'TotalAmt')
 
         return {
             'period_start': start_date.isoformat(),
@@ -167,14 +220,17 @@ class QuickBooksDataFetcher:
         end_date = end_date or datetime.now()
         start_date = start_date or (end_date - timedelta(days=30))
 
-        # Get bills
-        bills = self.client.get_bills(start_date, end_date)
-
-        # Get expenses
-        expenses = self.client.get_expenses(start_date, end_date)
+        txns = self._fetch_transactions(start_date, end_date, ('Bill', 'Purchase'))
+        return self._expense_summary(start_date, end_date, txns['Bill'], txns['Purchase'])
 
-        total_bills = sum(float(bill.get('TotalAmt', 0)) for bill in bills)
-        total_expenses = sum(float(exp.get('TotalAmt', 0)) for exp in expenses)
+    @staticmethod
+    def _expense_summary(start_date: datetime,
+                         end_date: datetime,
+                         bills: List[Dict],
+                         expenses: List[Dict]) -> Dict:
+        """Expense metrics of already fetched bills and cash purchases"""
+        total_bills = _sum_field(bills, 'TotalAmt')
+        total_expenses = _sum_field(expenses, 'TotalAmt')
 
         return {
             'period_start': start_date.isoformat(),
@@ -186,17 +242,40 @@ class QuickBooksDataFetcher:
             'expense_count': len(expenses)
         }
 
+    def _fetch_transactions(self,
+                            start_date: datetime,
+                            end_date: datetime,
+                            entities: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Transactions of each entity within a date range, keyed by entity
+
+        Lists are memoized per (entity, start day, end day) for TRANSACTION_TTL
+        seconds, so summaries over the same period share their fetches; the
+        entities not already held are fetched together in one batch request.
+        """
+        keys = {entity: ('transactions', entity, start_date.date(), end_date.date()) for entity in entities}
+
+        def fetch(missing: List[str]) -> Dict[str, List[Dict]]:
+            queries = self.client._txn_queries(start_date, end_date)
+            responses = self.client._batch_query({entity: queries[entity] for entity in missing})
+            return {entity: responses.get(entity, {}).get(entity, []) for entity in missing}
+
+        return self.client._cached_batch(keys, TRANSACTION_TTL, fetch)
+
     def get_account_balances_detailed(self) -> Dict[str, List[Dict]]:
         """
         Get detailed balances for all account types
 
         Returns:
-            Dictionary with account balances by type
+            Dictionary with account balances by type (cached for REFERENCE_TTL seconds)
         """
+        return self.client._cached('account_balances', REFERENCE_TTL, self._fetch_account_balances)
+
+    def _fetch_account_balances(self) -> Dict[str, List[Dict]]:
+        """Fetch active accounts and group their balances by type"""
         # Get all accounts
         query = "SELECT * FROM Account WHERE Active = true"
-        result = self.client._make_request('query', params={'query': query})
-        accounts = result.get('QueryResponse', {}).get('Account', [])
+        accounts = self.client._query_all(query, 'Account')
 
         # Group by account type
         balances = {
@@ -213,24 +292,18 @@ class QuickBooksDataFetcher:
         }
 
         for account in accounts:
-            account_type = account.get('AccountType', '').lower().replace(' ', '_')
-            balance_info = {
+            bucket = _ACCOUNT_TYPE_MAP.get(account.get('AccountType'))
+            if bucket is None:
+                continue  # Income, expense and other non-balance-sheet accounts
+
+            balances[bucket].append({
                 'id': account.get('Id'),
                 'name': account.get('Name'),
                 'account_type': account.get('AccountType'),
                 'account_sub_type': account.get('AccountSubType'),
                 'current_balance': float(account.get('CurrentBalance', 0)),
                 'currency': account.get('CurrencyRef', {}).get('value', 'USD')
-            }
-
-            if account_type in balances:
-                balances[account_type].append(balance_info)
-            elif 'bank' in account_type:
-                balances['bank'].append(balance_info)
-            elif 'receivable' in account_type:
-                balances['accounts_receivable'].append(balance_info)
-            elif 'payable' in account_type:
-                balances['accounts_payable'].append(balance_info)
+            })
 
         return balances
 
@@ -250,12 +323,17 @@ class QuickBooksDataFetcher:
         end_date = end_date or datetime.now()
         start_date = start_date or (end_date - timedelta(days=30))
 
-        # Get revenue and expense summaries
-        revenue = self.get_revenue_summary(start_date, end_date)
-        expenses = self.get_expense_summary(start_date, end_date)
+        # One batch request covers both summaries; overlap it with the cash balance
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            txns_future = ex.submit(self._fetch_transactions, start_date, end_date,
+                                    ('Invoice', 'Payment', 'Bill', 'Purchase'))
+            cash_future = ex.submit(self.client.get_cash_balance)
 
-        # Get current cash balance
-        cash_balance = self.client.get_cash_balance()
+            txns = txns_future.result()
+            cash_balance = cash_future.result()
+
+        revenue = self._revenue_summary(start_date, end_date, txns['Invoice'], txns['Payment'])
+        expenses = self._expense_summary(start_date, end_date, txns['Bill'], txns['Purchase'])
 
         # Calculate net cash flow
         net_cash_flow = revenue['total_collected'] - expenses['total_outflows']
@@ -279,15 +357,15 @@ class QuickBooksDataFetcher:
             active_only: Only return active customers
 
         Returns:
-            List of customer dictionaries
+            List of customer dictionaries (cached for REFERENCE_TTL seconds)
         """
         if active_only:
             query = "SELECT * FROM Customer WHERE Active = true"
         else:
             query = "SELECT * FROM Customer"
 
-        result = self.client._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Customer', [])
+        return self.client._cached(('customers', active_only), REFERENCE_TTL,
+                                   lambda: self.client._query_all(query, 'Customer'))
 
     def get_vendors(self, active_only: bool = True) -> List[Dict]:
         """
@@ -297,26 +375,25 @@ class QuickBooksDataFetcher:
             active_only: Only return active vendors
 
         Returns:
-            List of vendor dictionaries
+            List of vendor dictionaries (cached for REFERENCE_TTL seconds)
         """
         if active_only:
             query = "SELECT * FROM Vendor WHERE Active = true"
         else:
             query = "SELECT * FROM Vendor"
 
-        result = self.client._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Vendor', [])
+        return self.client._cached(('vendors', active_only), REFERENCE_TTL,
+                                   lambda: self.client._query_all(query, 'Vendor'))
 
     def get_items(self) -> List[Dict]:
         """
         Get all items/products/services
 
         Returns:
-            List of item dictionaries
+            List of item dictionaries (cached for REFERENCE_TTL seconds)
         """
         query = "SELECT * FROM Item WHERE Active = true"
-        result = self.client._make_request('query', params={'query': query})
-        return result.get('QueryResponse', {}).get('Item', [])
+        return self.client._cached('items', REFERENCE_TTL, lambda: self.client._query_all(query, 'Item'))
 
     def get_profit_and_loss(self,
                            start_date: Optional[datetime] = None,
@@ -335,8 +412,8 @@ class QuickBooksDataFetcher:
         start_date = start_date or datetime(end_date.year, 1, 1)  # Start of year
 
         params = {
-            'start_date': start_date.strftime('%Y-%m-%d'),
-            'end_date': end_date.strftime('%Y-%m-%d')
+            'start_date': _fmt_date(start_date),
+            'end_date': _fmt_date(end_date)
         }
 
         result = self.client._make_request('reports/ProfitAndLoss', params=params)
@@ -355,7 +432,7 @@ class QuickBooksDataFetcher:
         as_of_date = as_of_date or datetime.now()
 
         params = {
-            'date': as_of_date.strftime('%Y-%m-%d')
+            'date': _fmt_date(as_of_date)
         }
 
         result = self.client._make_request('reports/BalanceSheet', params=params)
@@ -377,23 +454,16 @@ class QuickBooksDataFetcher:
         end_date = end_date or datetime.now()
         start_date = start_date or (end_date - timedelta(days=365))
 
-        counts = {}
+        # Fetch every counted type in one batch request
+        queries = self.client._txn_queries(start_date, end_date)
+        responses = self.client._batch_query({
+            entity: queries[entity] for entity in ('Invoice', 'Payment', 'Bill', 'Purchase')
+        })
 
-        # Count invoices
-        invoices = self.get_all_invoices(start_date=start_date, end_date=end_date)
-        counts['invoices'] = len(invoices)
-
-        # Count payments
-        payments = self.client.get_payments(start_date, end_date)
-        counts['payments'] = len(payments)
-
-        # Count bills
-        bills = self.client.get_bills(start_date, end_date)
-        counts['bills'] = len(bills)
-
-        # Count expenses
-        expenses = self.client.get_expenses(start_date, end_date)
-        counts['expenses'] = len(expenses)
+        counts = {}
+        for key, entity in (('invoices', 'Invoice'), ('payments', 'Payment'),
+                            ('bills', 'Bill'), ('expenses', 'Purchase')):
+            counts[key] = len(responses.get(entity, {}).get(entity, []))
 
         counts['total'] = sum(counts.values())
 
@@ -3,7 +3,7 @@ QuickBooks Data Transformer
 Converts QuickBooks transaction format to Finly internal format
 """
 
-from datetime import datetime
+from datetime import date, datetime, time
 from typing import List, Dict
 from enum import Enum
 
@@ -81,6 +81,15 @@ class QuickBooksTransformer:
         if custom_category_map:
             self.category_map.update(custom_category_map)
 
+        # QuickBooks transaction type -> transform method
+        self._dispatch = {
+            'Invoice': self._transform_invoice,
+            'Payment': self._transform_payment,
+            'Bill': self._transform_bill,
+            'BillPayment': self._transform_bill_payment,
+            'Purchase': self._transform_expense,
+        }
+
     def transform_transactions(self, qb_transactions: List[Dict]) -> List[Dict]:
         """
         Transform list of QuickBooks transactions
@@ -91,31 +100,27 @@ class QuickBooksTransformer:
         Returns:
             List of Finly transaction dicts
         """
-        finly_transactions = []
-
-        for qb_txn in qb_transactions:
-            # Determine transaction type from QuickBooks object
-            txn_type = self._get_transaction_type(qb_txn)
+        dispatch = self._dispatch
 
-            if txn_type == 'Invoice':
-                finly_transactions.extend(self._transform_invoice(qb_txn))
-            elif txn_type == 'Payment':
-                finly_transactions.extend(self._transform_payment(qb_txn))
-            elif txn_type == 'Bill':
-                finly_transactions.extend(self._transform_bill(qb_txn))
-            elif txn_type == 'BillPayment':
-                finly_transactions.extend(self._transform_bill_payment(qb_txn))
-            elif txn_type == 'Purchase':
-                finly_transactions.extend(self._transform_expense(qb_txn))
+        # Route each transaction to its transform by QuickBooks type; unknown types are skipped
+        return [
+            finly_txn
+            for qb_txn in qb_transactions
+            for finly_txn in dispatch.get(self._get_transaction_type(qb_txn), self._transform_unknown)(qb_txn)
+        ]
 
-        return finly_transactions
+    @staticmethod
+    def _transform_unknown(qb_txn: Dict) -> List[Dict]:
+        """Unrecognized QuickBooks transactions produce no Finly transactions"""
+        return []
 
     def _get_transaction_type(self, qb_txn: Dict) -> str:
         """Determine QuickBooks transaction type"""
-        # QuickBooks transactions have a type indicator
-        for key in ['Invoice', 'Payment', 'Bill', 'BillPayment', 'Purchase']:
-            if key in str(type(qb_txn)) or qb_txn.get('domain') == key:
-                return key
+        # QuickBooks transactions have a type indicator (the 'domain' field, or the
+        # class name for SDK objects)
+        domain = qb_txn.get('domain') or type(qb_txn).__name__
+        if domain in self._dispatch:
+            return domain
 
         # Fallback: check which fields are present
         if 'CustomerRef' in qb_txn and 'TotalAmt' in qb_txn:
@@ -270,8 +275,8 @@ class QuickBooksTransformer:
     def _parse_date(self, date_str: str) -> str:
         """Parse QuickBooks date string"""
         try:
-            dt = datetime.strptime(date_str, '%Y-%m-%d')
-            return dt.isoformat()
+            # date.fromisoformat parses in C, without strptime's per-call format handling
+            return datetime.combine(date.fromisoformat(date_str), time()).isoformat()
         except:
             return datetime.now().isoformat()
 
@@ -155,6 +155,80 @@ def test_quickbooks_module(results: TestResults):
     except Exception as e:
         results.add_test("Date parsing", False, str(e))
 
+    # Test batch query paging against a mocked session
+    try:
+        import re
+        from src.quickbooks.client import QUERY_PAGE_SIZE
+
+        rows = [{'Id': str(i)} for i in range(2 * QUERY_PAGE_SIZE + 500)]
+
+        def page(query):
+            match = re.search(r'STARTPOSITION (\d+) MAXRESULTS (\d+)', query)
+            start, size = int(match.group(1)) - 1, int(match.group(2))
+            return rows[start:start + size]
+
+        class MockResponse:
+            def __init__(self, data):
+                self.status_code = 200
+                self.content = json.dumps(data).encode()
+                self.text = self.content.decode()
+
+        class MockSession:
+            def __init__(self):
+                self.queries = []
+
+            def post(self, url, headers=None, json=None):
+                return MockResponse({'BatchItemResponse': [
+                    {'bId': item['bId'], 'QueryResponse': {item['bId']: page(item['Query'])}}
+                    for item in json['BatchItemRequest']
+                ]})
+
+            def get(self, url, headers=None, params=None, **kwargs):
+                query = params['query']
+                self.queries.append(query)
+                if 'COUNT(*)' in query:
+                    return MockResponse({'QueryResponse': {'totalCount': len(rows)}})
+                return MockResponse({'QueryResponse': {'Invoice': page(query)}})
+
+        class MockAuth:
+            base_url = 'https://sandbox'
+            _session = MockSession()
+
+            def get_access_token(self):
+                return 'token'
+
+        client = QuickBooksClient(auth=MockAuth(), company_id='1')
+        result = client._batch_query({'Invoice': "SELECT * FROM Invoice ORDERBY TxnDate"})
+
+        assert [row['Id'] for row in result['Invoice']['Invoice']] == [row['Id'] for row in rows]
+        assert MockAuth._session.queries[0] == "SELECT COUNT(*) FROM Invoice"
+        assert len(MockAuth._session.queries) == 3  # Count, then the two remaining pages
+
+        results.add_test("Batch query paging", True)
+    except Exception as e:
+        results.add_test("Batch query paging", False, str(e))
+
+    # Test client cache reuse and eviction of expired entries
+    try:
+        client._cached('stale', 0, lambda: 'old')
+        assert client._cached('fresh', 60, lambda: 'first') == 'first'
+        assert client._cached('fresh', 60, lambda: 'second') == 'first'
+        assert 'stale' not in client._cache
+
+        fetched = []
+
+        def fetch(missing):
+            fetched.extend(missing)
+            return {name: name.upper() for name in missing}
+
+        assert client._cached_batch({'a': ('k', 'a')}, 60, fetch) == {'a': 'A'}
+        assert client._cached_batch({'a': ('k', 'a'), 'b': ('k', 'b')}, 60, fetch) == {'a': 'A', 'b': 'B'}
+        assert fetched == ['a', 'b']
+
+        results.add_test("Client cache eviction", True)
+    except Exception as e:
+        results.add_test("Client cache eviction", False, str(e))
+
 
 def test_forecasting_module(results: TestResults):
     """Test forecasting engine"""
@@ -243,6 +317,22 @@ def test_forecasting_module(results: TestResults):
     except Exception as e:
         results.add_test("Forecast calculations", False, str(e))
 
+    # Test forecast summaries follow edited points
+    try:
+        from dataclasses import replace
+
+        edited = replace(forecast, forecast_points=list(forecast.forecast_points))
+        edited.get_minimum_balance()
+        edited.forecast_points[0] = replace(edited.forecast_points[0], predicted_balance=-1e9)
+
+        assert edited.get_minimum_balance() == -1e9
+        assert edited.get_weeks_until_zero() == 1
+        assert edited.to_dict()['forecast_points'][0]['predicted_balance'] == -1e9
+
+        results.add_test("Forecast summaries follow edited points", True)
+    except Exception as e:
+        results.add_test("Forecast summaries follow edited points", False, str(e))
+
     # Test forecast validation
     try:
         validator = ForecastValidator()
@@ -255,6 +345,114 @@ def test_forecasting_module(results: TestResults):
     except Exception as e:
         results.add_test("Forecast validation", False, str(e))
 
+    # Test backtest accuracy goes through the category predictor
+    try:
+        backtest_engine = ForecastEngine(use_ensemble=False)
+        predict_category = backtest_engine.category_predictor.predict_category
+        predicted = []
+
+        def counting_predict(data, category, weeks_ahead=13):
+            predicted.append(category)
+            return predict_category(data, category, weeks_ahead)
+
+        backtest_engine.category_predictor.predict_category = counting_predict
+        year = generator.generate_transactions(num_weeks=52)
+        accuracy = backtest_engine._calculate_accuracy(year)
+
+        assert backtest_engine._calculate_accuracy(historical) is None
+        assert 0.0 <= accuracy <= 1.0
+        assert len(predicted) == len(set(predicted)) > 1
+
+        results.add_test("Backtest accuracy uses the category predictor", True)
+    except Exception as e:
+        results.add_test("Backtest accuracy uses the category predictor", False, str(e))
+
+    # Test incremental feature rows against engineer_features
+    try:
+        import numpy as np
+        import pandas as pd
+        from src.forecasting.ml_models.regression_model import CategoryRegressionForecaster
+        from src.forecasting.ml_models.xgboost_model import XGBoostForecaster
+
+        rng = np.random.default_rng(42)
+        values = rng.uniform(1000, 5000, 40)
+        values[rng.random(40) < 0.2] = 0.0
+        ts = pd.Series(values, index=pd.date_range('2023-01-01', periods=40, freq='W'))
+
+        # XGBoost rows are float32
+        for model, rtol in ((CategoryRegressionForecaster(), 1e-9), (XGBoostForecaster(), 1e-6)):
+            state = model._init_feature_state(ts.iloc[:20], 20)
+            row = model._incremental_features(state)
+
+            for m in range(20, 41):
+                if m > 20:
+                    row = model._incremental_features(state, values[m - 1])
+                expected = model.engineer_features(ts.iloc[:m]).iloc[-1].drop('value')
+                assert np.allclose(row[0], expected.to_numpy(dtype=np.float64),
+                                   rtol=rtol, atol=rtol, equal_nan=True), (type(model).__name__, m)
+
+        results.add_test("Incremental features match engineer_features", True)
+    except Exception as e:
+        results.add_test("Incremental features match engineer_features", False, str(e))
+
+    # Test bootstrap confidence band
+    try:
+        first = engine.generate_forecast(historical, "Test Company", use_bootstrap_ci=True)
+        again = engine.generate_forecast(historical, "Test Company", use_bootstrap_ci=True)
+        widths = [p.confidence_upper - p.confidence_lower for p in first.forecast_points]
+
+        # Seeded: same band on every call; k-week sums: band widens with the horizon
+        assert widths == [p.confidence_upper - p.confidence_lower for p in again.forecast_points]
+        assert widths[-1] > widths[0] > 0
+
+        # Numba kernel and NumPy fallback agree for a seed
+        from src.forecasting.engine import _boot_band, _boot_band_numpy, _boot_indices
+        samples = np.random.default_rng(0).normal(0, 1000, 52)
+        samples -= samples.mean()
+        idx = _boot_indices(samples.shape[0], 2000, 13, 42)
+        assert np.allclose(_boot_band(samples, idx, 0.2), _boot_band_numpy(samples, idx, 0.2))
+
+        results.add_test("Bootstrap confidence band", True)
+    except Exception as e:
+        results.add_test("Bootstrap confidence band", False, str(e))
+
+    # Test damped Holt kernel against statsmodels
+    try:
+        import warnings
+        import numpy as np
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        from src.forecasting._ets_kernels import (
+            ALPHAS, BETA_SHARES, PHIS, damped_holt_fit, damped_holt_forecast, damped_holt_optimize
+        )
+
+        rng = np.random.default_rng(42)
+        y = 1000 + 15 * np.arange(52) + rng.normal(0, 60, 52)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            # Same smoothing parameters: same fitted initial states, same forecasts
+            fixed = ExponentialSmoothing(y, trend='add', damped_trend=True).fit(
+                smoothing_level=0.4, smoothing_trend=0.2, damping_trend=0.9
+            )
+            optimized = ExponentialSmoothing(y, trend='add', damped_trend=True).fit()
+
+        assert np.allclose(damped_holt_forecast(y, 0.4, 0.2, 0.9, 13), fixed.forecast(13), rtol=1e-6)
+
+        # Fitted parameters: SSE no worse than statsmodels', forecasts within 1%
+        params = damped_holt_optimize(y, ALPHAS, BETA_SHARES, PHIS)
+        predictions = damped_holt_forecast(y, *params, 13)
+        assert damped_holt_fit(y, *params) <= optimized.sse * (1 + 1e-4)
+        assert np.allclose(predictions, optimized.forecast(13), rtol=0.01)
+        assert predictions[-1] > predictions[0]
+
+        # Interpreted search (no numba) picks the same parameters
+        if hasattr(damped_holt_optimize, 'py_func'):
+            assert np.allclose(damped_holt_optimize.py_func(y, ALPHAS, BETA_SHARES, PHIS), params)
+
+        results.add_test("Damped Holt kernel matches statsmodels", True)
+    except Exception as e:
+        results.add_test("Damped Holt kernel matches statsmodels", False, str(e))
+
 
 def test_data_processor(results: TestResults):
     """Test data processing utilities"""
@@ -325,6 +523,54 @@ def test_data_processor(results: TestResults):
     except Exception as e:
         results.add_test("Calculate category statistics", False, str(e))
 
+    # Test numpy week bucketing against the pandas Grouper
+    try:
+        import pandas as pd
+        from utils.sample_data import SampleDataGenerator
+
+        sample = SampleDataGenerator(seed=42).generate_transactions(num_weeks=26)
+
+        for frequency in ('W', 'D'):
+            df = sample.to_dataframe().set_index('date')
+            expected = df.groupby([
+                pd.Grouper(freq=frequency), 'category', 'transaction_type'
+            ], observed=True)['amount'].sum().reset_index()
+
+            pd.testing.assert_frame_equal(
+                processor._group_numpy(sample, frequency), expected, check_dtype=False
+            )
+
+        results.add_test("Numpy aggregation matches pandas Grouper", True)
+    except Exception as e:
+        results.add_test("Numpy aggregation matches pandas Grouper", False, str(e))
+
+    # Test cached arrays and aggregates follow transaction changes
+    try:
+        from dataclasses import replace
+
+        changed = HistoricalData(
+            transactions=list(transactions),
+            start_date=historical.start_date,
+            end_date=historical.end_date,
+            opening_balance=historical.opening_balance
+        )
+        processor.aggregate_by_category(changed, frequency='W')
+
+        # Replaced with a list of the same length
+        changed.transactions = [replace(txn, amount=2000.0) for txn in transactions]
+        assert (changed.to_dataframe()['amount'] == 2000.0).all()
+        assert processor.aggregate_by_category(changed, frequency='W')['amount'].sum() == 2000.0 * 30
+
+        # Edited in place, then invalidated
+        changed.transactions[0] = replace(transactions[0], amount=500.0)
+        changed.invalidate()
+        assert changed.to_dataframe()['amount'].iloc[0] == 500.0
+        assert processor.aggregate_by_category(changed, frequency='W')['amount'].sum() == 2000.0 * 29 + 500.0
+
+        results.add_test("Cached arrays and aggregates follow transaction changes", True)
+    except Exception as e:
+        results.add_test("Cached arrays and aggregates follow transaction changes", False, str(e))
+
 
 def test_integration(results: TestResults):
     """Test integration between modules"""